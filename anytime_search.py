@@ -0,0 +1,199 @@
+import heapq
+import time
+from typing import Dict, List, Optional
+from container_ship import ContainerShip, ContainerMove, ShipKey, pack_move, unpack_move
+from heuristic import partition_heuristic
+from astar import beam_search
+from search_stats import SearchStats, search_ops
+
+#anytime repairing A* (ARA*): a weighted A* pass (f = g + w*h) finds a plan quickly, then w is lowered and the
+#search resumes from where it stopped instead of starting over, until w reaches 1 or the time budget runs out.
+#a pass that finishes at weight w proves the incumbent costs at most w times the optimum, and the reported
+#bound is tightened further with the smallest unweighted g + h still waiting to be expanded.
+#
+#on_plan(moves, cost, bound) is called for every new plan and whenever the bound on the current one improves.
+#Returns (move_history_list, total_g_cost, num_moves, bound) or (None, 0, 0, inf) if no plan was found in time.
+#when the passes run out of states without meeting the goal, the best balanced state is the plan (see closest_plan).
+#stats, a SearchStats, collects counters and timers over all passes when given (see a_star_search).
+#when the first pass has no plan after FALLBACK_AFTER of the budget, a beam search of fallback_width is run
+#once and its plan becomes the incumbent, so a hard bay still ends with a usable plan; the passes carry on
+#and replace it when they find a cheaper one.
+FALLBACK_AFTER = 0.5
+
+def anytime_search(intial_ship: ContainerShip, time_limit: float = 10.0, initial_weight: float = 3.0,
+                   weight_step: float = 0.5, heuristic=partition_heuristic, on_plan=None,
+                   stats: Optional[SearchStats] = None, fallback_width: int = 50):
+    started = time.perf_counter()
+    deadline = started + time_limit
+    fallback_at = started + FALLBACK_AFTER * time_limit
+    beam_heuristic = heuristic
+    if stats is not None:
+        stats.start("anytime")
+    get_moves, is_goal, state_key, copy_ship, heuristic = search_ops(stats, heuristic)
+    start_key = state_key(intial_ship)
+
+    #state -> [g, h, parent key, packed move, ship]
+    records: Dict[ShipKey, list] = {start_key: [0, heuristic(intial_ship), None, 0, intial_ship]}
+    weight = max(1.0, initial_weight)
+
+    open_heap = []
+    counter = 0
+    closed = set()
+    incons = set()
+
+    best_moves = None #the incumbent plan (it may come from the beam fallback, with no goal state here)
+    best_cost = float('inf')
+    best_bound = float('inf')
+    closest = (float('inf'), 0, None) #(|P-S|, g, key) of the best balanced state expanded
+
+    def push(key: ShipKey):
+        nonlocal counter
+        rec = records[key]
+        heapq.heappush(open_heap, (rec[0] + weight * rec[1], counter, key, rec[0]))
+        counter += 1
+
+    def path_to(key: ShipKey) -> List[ContainerMove]:
+        moves = []
+        while records[key][2] is not None:
+            moves.append(unpack_move(records[key][3]))
+            key = records[key][2]
+        moves.reverse()
+        return moves
+
+    #smallest unweighted f among states that may still lead to a cheaper plan
+    #(expanding_f covers the node whose successors are being generated when a goal shows up mid-pass)
+    def lower_bound(expanding_f: float) -> float:
+        lb = min(best_cost, expanding_f)
+        for _, _, key, g in open_heap:
+            rec = records[key]
+            if g == rec[0]:
+                lb = min(lb, rec[0] + rec[1])
+        for key in incons:
+            rec = records[key]
+            lb = min(lb, rec[0] + rec[1])
+        return lb
+
+    #the weight only bounds the plan once a pass has finished, mid-pass only the open list counts
+    def report(pass_finished: bool, expanding_f: float = float('inf')):
+        nonlocal best_bound
+        lb = lower_bound(expanding_f)
+        bound = best_cost / lb if lb > 0 else 1.0
+        if pass_finished:
+            bound = min(weight, bound)
+        if bound < best_bound:
+            best_bound = bound
+            if on_plan is not None:
+                on_plan(best_moves, best_cost, bound)
+
+    def accept_goal(key: ShipKey, g: float, expanding_f: float):
+        nonlocal best_moves, best_cost, best_bound
+        if g < best_cost:
+            best_moves, best_cost = path_to(key), g
+            best_bound = float('inf') #new plan, always reported
+            report(False, expanding_f)
+
+    def finish(result):
+        if stats is not None:
+            stats.expansions = expansions
+            stats.visited_entries = len(records)
+            #every record keeps its own ship
+            stats.estimate_memory(intial_ship, (records, closed), stored_ships=len(records))
+            stats.stop(result[0] is not None)
+        return result
+
+    expansions = 0
+    if is_goal(intial_ship):
+        accept_goal(start_key, 0, 0)
+        return finish(([], 0, 0, 1.0))
+
+    push(start_key)
+    timed_out = False
+
+    while True:
+        #ImprovePath: expand until no queued state can beat the incumbent at the current weight
+        while open_heap and open_heap[0][0] < best_cost:
+            if stats is not None:
+                stats.note_open_size(len(open_heap))
+            _, _, key, g = heapq.heappop(open_heap)
+            rec = records[key]
+            if g != rec[0] or key in closed:
+                if stats is not None:
+                    stats.stale_pops += 1
+                continue #stale entry
+            closed.add(key)
+
+            expansions += 1
+            if expansions % 64 == 0:
+                now = time.perf_counter()
+                if best_moves is None and now > fallback_at:
+                    fallback_at = float('inf') #only once
+                    moves, cost, _ = beam_search(intial_ship, width=fallback_width, heuristic=beam_heuristic)
+                    if moves is not None:
+                        best_moves, best_cost = moves, cost
+                        best_bound = float('inf')
+                        report(False, rec[0] + rec[1])
+                    now = time.perf_counter()
+                if now > deadline:
+                    timed_out = True
+                    break
+
+            ship = rec[4]
+            diff = abs(ship.port_weight - ship.starboard_weight)
+            if diff < closest[0] or (diff == closest[0] and g < closest[1]):
+                closest = (diff, g, key)
+            for move in get_moves(ship):
+                new_g = g + move.cost
+                ship.make_move(move)
+                new_key = state_key(ship)
+                old = records.get(new_key)
+                if stats is not None:
+                    stats.generated += 1
+                    if old is not None:
+                        if new_g >= old[0]:
+                            stats.duplicates += 1
+                        else:
+                            stats.reopens += 1
+                if old is not None and new_g >= old[0]:
+                    ship.unmake_move(move)
+                    continue
+
+                goal = is_goal(ship)
+                h = 0.0 if goal else (old[1] if old is not None else heuristic(ship))
+                records[new_key] = [new_g, h, key, pack_move(move), copy_ship(ship)]
+                ship.unmake_move(move)
+
+                #goals end the plan, they are never expanded
+                if goal:
+                    accept_goal(new_key, new_g, rec[0] + rec[1])
+                elif new_key in closed:
+                    incons.add(new_key)
+                else:
+                    push(new_key)
+
+        if timed_out:
+            break
+        if best_moves is not None:
+            report(True)
+        if weight <= 1.0 or not (open_heap or incons):
+            break
+
+        #lower the weight, move the inconsistent states back into OPEN and re-key everything
+        weight = max(1.0, weight - weight_step)
+        pending = {key for _, _, key, g in open_heap if g == records[key][0]} | incons
+        open_heap = []
+        incons = set()
+        closed = set()
+        for key in pending:
+            push(key)
+
+    if best_moves is None and not (timed_out or open_heap or incons) and closest[2] is not None:
+        #every state was expanded at its final g, so the closest one is the best reachable balance
+        best_moves, best_cost, best_bound = path_to(closest[2]), closest[1], 1.0
+    if best_moves is None:
+        return finish((None, 0, 0, float('inf')))
+
+    moves = best_moves
+    num_moves = len(moves)
+    if num_moves > 0:
+        num_moves += 2
+    return finish((moves, best_cost, num_moves, best_bound))
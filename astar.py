@@ -1,19 +1,88 @@
 import heapq
+import sys
+from array import array
 from collections import namedtuple
-from typing import Tuple, Dict
-from container_ship import ContainerShip
-from heuristic import balance_heuristic
+from typing import Dict, List, Optional
+from container_ship import ContainerShip, ContainerMove, ShipKey, pack_move, unpack_move
+from heuristic import partition_heuristic
+from move_pruning import PruningRules
+from search_stats import SearchStats, search_ops
 
-#defines a container for each node in the Astar search tree
-PathNode = namedtuple('PathNode', ['ship_state', 'g_cost', 'move_history'])
+#defines a container for each node in the Astar search tree (the path lives in the NodeArena)
+PathNode = namedtuple('PathNode', ['ship_state', 'g_cost', 'node_id'])
+
+#every generated search node as two parallel arrays: parent index and packed move.
+#a queued node only carries its index, so its size no longer grows with the plan length,
+#and the move list is rebuilt once by walking parents when the goal is popped.
+class NodeArena:
+    __slots__ = ('parents', 'moves')
+
+    def __init__(self):
+        self.parents = array('i', [-1]) #node 0 is the start state
+        self.moves = array('Q', [0])
+
+    def add(self, parent: int, packed_move: int) -> int:
+        self.parents.append(parent)
+        self.moves.append(packed_move)
+        return len(self.parents) - 1
+
+    def path(self, node_id: int) -> List[ContainerMove]:
+        moves = []
+        while node_id > 0:
+            moves.append(unpack_move(self.moves[node_id]))
+            node_id = self.parents[node_id]
+        moves.reverse()
+        return moves
+
+#the open list ran dry without reaching a goal: every reachable state was expanded, so the imbalance the
+#partition DP promised cannot be reached (it ignores how containers are stacked). the best balanced state
+#expanded, the cheapest way, is the goal after all and its plan is returned. closest is (|P-S|, g, node id)
+#of that state. the ship's solver is left alone, so checking the plan needs that imbalance passed in
+#(verify_plan's min_imbalance; the plan cache stores it with the plan).
+#the idle rule can hide states, so with it on there is no such proof and nothing is returned
+def closest_plan(closest: tuple, arena: NodeArena, rules: PruningRules):
+    _, g_cost, node_id = closest
+    if node_id is None or rules.idle:
+        return None, 0, 0
+    move_history = arena.path(node_id)
+    num_moves = len(move_history)
+    if num_moves > 0:
+        num_moves += 2
+    return move_history, g_cost, num_moves
 
 #will find minimal total crane time to reach goal balance 
 #Returns (move_history_list, total_g_cost, num_moves) or (None, 0, 0) if not found.
-def a_star_search(intial_ship: ContainerShip, max_expansions: int = 100000):
-    start_grid = intial_ship.grid_tuple()
+#when every reachable state is expanded without meeting the goal, the best balanced one is returned (closest_plan).
+#prune_commuting skips a move whose column span lies entirely left of the previous move's span:
+#the two commute, so the same pair is still explored in left-to-right order from the parent.
+#pruning, a PruningRules, picks the successor pruning rules (see move_pruning); by default every
+#optimality-safe rule is on, with the commute rule following prune_commuting.
+#mode="ida" switches to ida_star_search, which keeps a fixed memory footprint (see below).
+#mode="pea" switches to pea_star_search, which only copies the successors that can be popped next.
+#weight > 1 gives weighted A* (f = g + weight*h): faster, and the plan costs at most weight times the optimum.
+#stats, a SearchStats, is filled with counters, phase timers and memory estimates when given.
+def a_star_search(intial_ship: ContainerShip, max_expansions: int = 100000, heuristic=partition_heuristic,
+                  prune_commuting: bool = True, mode: str = "astar", table_size: int = 500000,
+                  weight: float = 1.0, stats: Optional[SearchStats] = None,
+                  pruning: Optional[PruningRules] = None):
+    if mode == "ida":
+        return ida_star_search(intial_ship, max_expansions, heuristic, prune_commuting, table_size, stats, pruning)
+    if mode == "pea":
+        return pea_star_search(intial_ship, max_expansions, heuristic, prune_commuting, weight, stats, pruning)
+    if mode != "astar":
+        raise ValueError(f"Unknown search mode: {mode}")
+    rules = pruning if pruning is not None else PruningRules(commute=prune_commuting)
+    pruned_before = dict(rules.counts)
+
+    if stats is not None:
+        stats.start("astar" if weight <= 1.0 else f"weighted astar (w={weight:g})")
+    get_moves, is_goal, state_key, copy_ship, heuristic = search_ops(stats, heuristic)
+
+    start_key = state_key(intial_ship)
     #heuristic estimate of cost from start to goal
-    start_h = balance_heuristic(intial_ship)
-    start_node = PathNode(intial_ship, 0, [])
+    start_h = weight * heuristic(intial_ship)
+    arena = NodeArena()
+    start_node = PathNode(intial_ship, 0, 0)
 
     #priority queue (a min heap) stores (f_cost, counter, node)
     pq = []
@@ -21,52 +90,369 @@ def a_star_search(intial_ship: ContainerShip, max_expansions: int = 100000):
     heapq.heappush(pq,(start_h, counter, start_node))
     counter +=1
 
-    # a dictionary to track the lowest cost to reach each grid state so no revisting worse paths 
-    visited_costs: Dict[Tuple, float] = {start_grid: 0.0}
+    # a dictionary to track the lowest cost to reach each ship state so no revisting worse paths 
+    visited_costs: Dict[ShipKey, float] = {start_key: 0.0}
+    #packed last move on the best known path to each state, None once two equally cheap paths disagree.
+    #the pruning rules only look at this move so dropping an equal-cost duplicate never
+    #hides a successor that the dropped path would have allowed
+    last_moves: Dict[ShipKey, Optional[int]] = {start_key: None}
+    #g at which a state was expanded without any pruning, so a relaxed re-push is not expanded twice
+    fully_expanded: Dict[ShipKey, float] = {}
+    track_last = rules.uses_last_move
     expansions = 0
+    closest = (float('inf'), 0, None) #best balanced state expanded, for closest_plan
+
+    def finish(result):
+        if stats is not None:
+            stats.expansions = expansions
+            stats.visited_entries = len(visited_costs)
+            arena_bytes = len(arena.parents) * (arena.parents.itemsize + arena.moves.itemsize)
+            stats.estimate_memory(intial_ship, (visited_costs, last_moves, fully_expanded), arena_bytes)
+            stats.note_pruned(rules, pruned_before)
+            stats.stop(result[0] is not None)
+        return result
 
     #this is the main a star loop until the queue is empty or goal is found
     while pq:
+        if stats is not None:
+            stats.note_open_size(len(pq))
         #pop the node with the lowest estimated total cost 
         f_cost, _, node = heapq.heappop(pq)
         ship = node.ship_state
         #gcost is the actual crane move cost to reach a state
         g_cost = node.g_cost
+        key = state_key(ship)
+
+        #a cheaper path to this state was queued after this one
+        if g_cost > visited_costs[key]:
+            if stats is not None:
+                stats.stale_pops += 1
+            continue
 
-        if ship.is_goal():
-            num_moves = len(node.move_history)
+        if is_goal(ship):
+            move_history = arena.path(node.node_id)
+            num_moves = len(move_history)
             if num_moves > 0:
                 num_moves += 2
                 
-            return node.move_history, g_cost, num_moves
+            return finish((move_history, g_cost, num_moves))
+
+        last_move = last_moves[key] if track_last else None
+        if last_move is None:
+            if fully_expanded.get(key) == g_cost:
+                if stats is not None:
+                    stats.stale_pops += 1
+                continue
+            fully_expanded[key] = g_cost
         
         expansions += 1
         if expansions > max_expansions:
-            return None, 0, 0
+            return finish((None, 0, 0))
+        diff = abs(ship.port_weight - ship.starboard_weight)
+        if diff < closest[0] or (diff == closest[0] and g_cost < closest[1]):
+            closest = (diff, g_cost, node.node_id)
         
-        for new_ship, move in ship.get_valid_moves():
+        #successors are made/unmade in place on the popped ship, only queued ones get copied
+        for move in rules.apply(ship, get_moves(ship), unpack_move(last_move) if last_move is not None else None):
+            if stats is not None:
+                stats.generated += 1
+
             #total cost to reach new node
             new_g = g_cost + move.cost
-            new_grid = new_ship.grid_tuple()
-            if new_grid in visited_costs and new_g >= visited_costs[new_grid]:
-                continue
+            packed = pack_move(move)
+            ship.make_move(move)
+            new_key = state_key(ship)
+            best_g = visited_costs.get(new_key)
+            if best_g is not None and new_g >= best_g:
+                #an equally cheap path through a different last move widens what that state may expand
+                if not (track_last and new_g == best_g and last_moves[new_key] is not None
+                        and last_moves[new_key] != packed):
+                    if stats is not None:
+                        stats.duplicates += 1
+                    ship.unmake_move(move)
+                    continue
+                last_moves[new_key] = None
+            else:
+                if best_g is not None and stats is not None:
+                    stats.reopens += 1
+                last_moves[new_key] = packed
             
             #saves the best cost to reach this state
-            visited_costs[new_grid] = new_g
+            visited_costs[new_key] = new_g
             #compute new hueristic cost for new ship
-            h = balance_heuristic(new_ship)
-            new_f = new_g + h
+            h = heuristic(ship)
+            new_f = new_g + weight * h
+            new_ship = copy_ship(ship)
+            ship.unmake_move(move)
 
-            #append the moves to the history-> put into new state into a PathNode-> push it into the queue with the fcost-> increment counter 
-            new_history = node.move_history + [move]
-            new_node = PathNode(new_ship,new_g,new_history)
+            #record the move in the arena-> put into new state into a PathNode-> push it into the queue with the fcost-> increment counter 
+            new_node = PathNode(new_ship,new_g,arena.add(node.node_id, packed))
             heapq.heappush(pq,(new_f,counter,new_node))
             counter += 1
 
-    return None, 0, 0
+    return finish(closest_plan(closest, arena, rules))
+
+
+#partial expansion A*: expanding a node scores every successor in place (make/unmake, no copy) but only
+#materializes the ones with f <= the node's f. the rest stay with the parent as (f, packed move) pairs
+#sorted by f, and the parent is queued again at the smallest deferred f; each time it is popped it
+#materializes the next slice. the parent stands in for its deferred children in the queue, so the same
+#states are expanded in the same f order as a_star_search, but a wide bay no longer copies 100+ ships
+#per expansion of which most are never popped. same arguments and return value as a_star_search.
+def pea_star_search(intial_ship: ContainerShip, max_expansions: int = 100000, heuristic=partition_heuristic,
+                    prune_commuting: bool = True, weight: float = 1.0, stats: Optional[SearchStats] = None,
+                    pruning: Optional[PruningRules] = None):
+    rules = pruning if pruning is not None else PruningRules(commute=prune_commuting)
+    pruned_before = dict(rules.counts)
+    if stats is not None:
+        stats.start("pea" if weight <= 1.0 else f"weighted pea (w={weight:g})")
+    get_moves, is_goal, state_key, copy_ship, heuristic = search_ops(stats, heuristic)
+
+    start_key = state_key(intial_ship)
+    arena = NodeArena()
+    #queue entries are (f, counter, node, deferred): deferred is None until the node is first expanded,
+    #then the (f, packed move) pairs of the successors not materialized yet, smallest f first
+    pq = [(weight * heuristic(intial_ship), 0, PathNode(intial_ship, 0, 0), None)]
+    counter = 1
+    visited_costs: Dict[ShipKey, float] = {start_key: 0.0}
+    last_moves: Dict[ShipKey, Optional[int]] = {start_key: None} #same roles as in a_star_search
+    fully_expanded: Dict[ShipKey, float] = {}
+    track_last = rules.uses_last_move
+    expansions = 0
+    closest = (float('inf'), 0, None)
+
+    def finish(result):
+        if stats is not None:
+            stats.expansions = expansions
+            stats.visited_entries = len(visited_costs)
+            arena_bytes = len(arena.parents) * (arena.parents.itemsize + arena.moves.itemsize)
+            stats.estimate_memory(intial_ship, (visited_costs, last_moves, fully_expanded), arena_bytes)
+            stats.note_pruned(rules, pruned_before)
+            stats.stop(result[0] is not None)
+        return result
+
+    while pq:
+        if stats is not None:
+            stats.note_open_size(len(pq))
+        f_cost, _, node, deferred = heapq.heappop(pq)
+        ship = node.ship_state
+        g_cost = node.g_cost
+        key = state_key(ship)
+
+        #a cheaper path to this state was queued after this one (its deferred successors go with it)
+        if g_cost > visited_costs[key]:
+            if stats is not None:
+                stats.stale_pops += 1
+            continue
+
+        if deferred is None:
+            if is_goal(ship):
+                move_history = arena.path(node.node_id)
+                num_moves = len(move_history)
+                if num_moves > 0:
+                    num_moves += 2
+                return finish((move_history, g_cost, num_moves))
+
+            last_move = last_moves[key] if track_last else None
+            if last_move is None:
+                if fully_expanded.get(key) == g_cost:
+                    if stats is not None:
+                        stats.stale_pops += 1
+                    continue
+                fully_expanded[key] = g_cost
+
+            expansions += 1
+            if expansions > max_expansions:
+                return finish((None, 0, 0))
+            diff = abs(ship.port_weight - ship.starboard_weight)
+            if diff < closest[0] or (diff == closest[0] and g_cost < closest[1]):
+                closest = (diff, g_cost, node.node_id)
+
+            #score every successor; a state already reached more cheaply can be dropped right away,
+            #the exact duplicate check waits until the successor is materialized
+            deferred = []
+            for move in rules.apply(ship, get_moves(ship), unpack_move(last_move) if last_move is not None else None):
+                if stats is not None:
+                    stats.generated += 1
+                new_g = g_cost + move.cost
+                ship.make_move(move)
+                best_g = visited_costs.get(state_key(ship))
+                if best_g is not None and new_g > best_g:
+                    if stats is not None:
+                        stats.duplicates += 1
+                else:
+                    deferred.append((new_g + weight * heuristic(ship), pack_move(move)))
+                ship.unmake_move(move)
+            deferred.sort()
+
+        #materialize the successors that are due at this f
+        i = 0
+        while i < len(deferred) and deferred[i][0] <= f_cost:
+            new_f, packed = deferred[i]
+            i += 1
+            move = unpack_move(packed)
+            new_g = g_cost + move.cost
+            ship.make_move(move)
+            new_key = state_key(ship)
+            best_g = visited_costs.get(new_key)
+            if best_g is not None and new_g >= best_g:
+                if not (track_last and new_g == best_g and last_moves[new_key] is not None
+                        and last_moves[new_key] != packed):
+                    if stats is not None:
+                        stats.duplicates += 1
+                    ship.unmake_move(move)
+                    continue
+                last_moves[new_key] = None
+            else:
+                if best_g is not None and stats is not None:
+                    stats.reopens += 1
+                last_moves[new_key] = packed
+            visited_costs[new_key] = new_g
+            new_ship = copy_ship(ship)
+            ship.unmake_move(move)
+            heapq.heappush(pq, (new_f, counter, PathNode(new_ship, new_g, arena.add(node.node_id, packed)), None))
+            counter += 1
+
+        #the parent goes back in at its next-best deferred successor
+        if i < len(deferred):
+            heapq.heappush(pq, (deferred[i][0], counter, node, deferred[i:]))
+            counter += 1
+
+    return finish(closest_plan(closest, arena, rules))
+
+
+#iterative deepening A*: depth-first passes bounded by f = g + h, raising the bound to the smallest f that
+#was cut off until a goal fits. memory is the current path plus a transposition table capped at
+#table_size entries, so dense manifests cannot blow up the way visited_costs/the heap do.
+#with an admissible heuristic the first goal found is optimal, same contract as a_star_search.
+def ida_star_search(intial_ship: ContainerShip, max_expansions: int = 100000, heuristic=partition_heuristic,
+                    prune_commuting: bool = True, table_size: int = 500000, stats: Optional[SearchStats] = None,
+                    pruning: Optional[PruningRules] = None):
+    rules = pruning if pruning is not None else PruningRules(commute=prune_commuting)
+    pruned_before = dict(rules.counts)
+    if stats is not None:
+        stats.start("ida")
+    get_moves, is_goal, state_key, _, heuristic = search_ops(stats, heuristic)
+    ship = intial_ship.copy() #searched in place with make/unmake
+    path = []
+    expansions = 0
+    found = False
+
+    #transposition table: state -> (g, last move) of the cheapest visit in the current pass.
+    #a revisit with a higher g (or equal g under the same/no pruning constraint) cannot do better
+    table: Dict[ShipKey, tuple] = {}
+
+    #returns the smallest f above the bound seen below this node (inf when nothing was cut)
+    def dfs(g: float, bound: float, last_move: Optional[ContainerMove]) -> float:
+        nonlocal expansions, found
+        f = g + heuristic(ship)
+        if f > bound:
+            return f
+        if is_goal(ship):
+            found = True
+            return f
+
+        key = state_key(ship)
+        seen = table.get(key)
+        if seen is not None and (seen[0] < g or (seen[0] == g and seen[1] in (None, last_move))):
+            if stats is not None:
+                stats.duplicates += 1
+            return float('inf')
+        if seen is not None or len(table) < table_size:
+            table[key] = (g, last_move)
+
+        expansions += 1
+        if expansions > max_expansions:
+            return float('inf')
+
+        next_bound = float('inf')
+        for move in rules.apply(ship, get_moves(ship), last_move):
+            if stats is not None:
+                stats.generated += 1
+                stats.note_open_size(len(path) + 1)
+            ship.make_move(move)
+            path.append(move)
+            t = dfs(g + move.cost, bound, move)
+            if found:
+                ship.unmake_move(move)
+                return t
+            path.pop()
+            ship.unmake_move(move)
+            if t < next_bound:
+                next_bound = t
+            if expansions > max_expansions:
+                break
+        return next_bound
+
+    def finish(result):
+        if stats is not None:
+            stats.expansions = expansions
+            stats.visited_entries = len(table)
+            stats.estimate_memory(intial_ship, (table,))
+            stats.note_pruned(rules, pruned_before)
+            stats.stop(result[0] is not None)
+        return result
 
+    #plans are short, but make sure a deep pass never trips the default recursion limit.
+    #the old limit is put back afterwards, the rest of the process keeps its own
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(old_limit, 10000))
+    try:
+        bound = heuristic(ship)
+        while True:
+            table.clear()
+            next_bound = dfs(0, bound, None)
+            if found:
+                num_moves = len(path)
+                if num_moves > 0:
+                    num_moves += 2
+                return finish((path, sum(m.cost for m in path), num_moves))
+            if expansions > max_expansions or next_bound == float('inf'):
+                return finish((None, 0, 0))
+            bound = next_bound
+    finally:
+        sys.setrecursionlimit(old_limit)
 
+#beam search: expands the search tree layer by layer (one more move per layer) and keeps only the `width`
+#most promising states by f = g + h in each layer. memory and time per layer are bounded, the plan is not
+#guaranteed optimal. keeps going while the beam can still beat the best plan found.
+#Returns (move_history_list, total_g_cost, num_moves) or (None, 0, 0) if no plan was found.
+def beam_search(intial_ship: ContainerShip, width: int = 200, heuristic=partition_heuristic, max_depth: int = 60):
+    if intial_ship.is_goal():
+        return [], 0, 0
 
+    arena = NodeArena()
+    visited_costs: Dict[ShipKey, float] = {intial_ship.state_key(): 0}
+    beam = [(heuristic(intial_ship), 0, intial_ship, 0)] #(f, g, ship, node id)
+    best_cost, best_node = float('inf'), None
 
+    for _ in range(max_depth):
+        layer = []
+        for _, g, ship, node_id in beam:
+            for move in ship.get_candidate_moves():
+                new_g = g + move.cost
+                if new_g >= best_cost:
+                    continue
+                ship.make_move(move)
+                new_key = ship.state_key()
+                if new_key in visited_costs and new_g >= visited_costs[new_key]:
+                    ship.unmake_move(move)
+                    continue
+                visited_costs[new_key] = new_g
+                child_id = arena.add(node_id, pack_move(move))
+                if ship.is_goal():
+                    best_cost, best_node = new_g, child_id
+                else:
+                    f = new_g + heuristic(ship)
+                    if f < best_cost:
+                        layer.append((f, new_g, ship.copy(), child_id))
+                ship.unmake_move(move)
 
+        if not layer:
+            break
+        beam = heapq.nsmallest(width, layer, key=lambda entry: entry[0])
 
+    if best_node is None:
+        return None, 0, 0
+    move_history = arena.path(best_node)
+    return move_history, best_cost, len(move_history) + 2
@@ -0,0 +1,83 @@
+from typing import List, Tuple
+
+#answer to "how close to balanced can this ship ever get?"
+#the balances only depend on the multiset of movable container weights and on how many usable slots
+#each side has, so this is solved once per manifest with a subset-sum DP and then shared (by reference)
+#by every state derived from that manifest. the DP ignores the stacking order, so on a crowded bay its
+#minimum can be lower than anything the crane reaches (the searches then fall back, see astar.closest_plan).
+class BalanceSolver:
+    def __init__(self, weights: List[int], port_slots: int, starboard_slots: int,
+                 fixed_port: int = 0, fixed_starboard: int = 0):
+        #weights = containers that can be moved, fixed_* = weight that can never leave its side
+        self.total_weight = sum(weights) + fixed_port + fixed_starboard
+
+        #bit p of port_sums is set when a port weight of exactly p is reachable
+        self.port_sums = self._reachable_port_sums(weights, port_slots, starboard_slots) << fixed_port
+
+        below, above = nearest_sums(self.port_sums, self.total_weight // 2)
+        candidates = [abs(self.total_weight - 2 * p) for p in (below, above) if p is not None]
+        self.min_imbalance = min(candidates) if candidates else 0
+
+        #bit p of goal_sums is set when a reachable port weight p satisfies ContainerShip.is_goal
+        self.goal_sums = self.port_sums & self._goal_band()
+
+    #mask of port weights inside the legal band (|T - 2p| < 10% of T) or at the minimal imbalance.
+    #uses the same float test as is_goal so the two never disagree on the band edges
+    def _goal_band(self) -> int:
+        total = self.total_weight
+        if total == 0:
+            return -1 #everything is a goal on an empty ship
+        threshold = 0.10 * total
+        lo = max(0, int(0.45 * total) - 1)
+        hi = int(0.55 * total) + 2
+        while lo <= hi and not abs(total - 2 * lo) < threshold:
+            lo += 1
+        while hi >= lo and not abs(total - 2 * hi) < threshold:
+            hi -= 1
+
+        band = ((1 << (hi + 1)) - 1) ^ ((1 << lo) - 1) if lo <= hi else 0
+        for doubled in (total - self.min_imbalance, total + self.min_imbalance):
+            if doubled >= 0 and doubled % 2 == 0:
+                band |= 1 << (doubled // 2)
+        return band
+
+    #subset-sum bitset over the movable weights; the count-indexed version is only needed
+    #when one side is too small to hold every container (otherwise any split fits)
+    @staticmethod
+    def _reachable_port_sums(weights: List[int], port_slots: int, starboard_slots: int) -> int:
+        n = len(weights)
+        lo = max(0, n - starboard_slots) #fewest containers port can hold
+        hi = min(n, port_slots) #most containers port can hold
+        if lo > hi:
+            return 0
+
+        if lo == 0 and hi == n:
+            sums = 1
+            for w in weights:
+                sums |= sums << w
+            return sums
+
+        #by_count[k] = sums reachable with exactly k containers on port
+        by_count = [0] * (hi + 1)
+        by_count[0] = 1
+        for i, w in enumerate(weights):
+            for k in range(min(i, hi - 1), -1, -1):
+                if by_count[k]:
+                    by_count[k + 1] |= by_count[k] << w
+
+        sums = 0
+        for k in range(lo, hi + 1):
+            sums |= by_count[k]
+        return sums
+
+#finds the largest set bit <= target and the smallest set bit >= target (None when missing)
+def nearest_sums(bits: int, target: int) -> Tuple[int, int]:
+    if target < 0:
+        below = None
+    else:
+        low = bits & ((1 << (target + 1)) - 1)
+        below = low.bit_length() - 1 if low else None
+
+    high = bits >> max(target, 0)
+    above = max(target, 0) + ((high & -high).bit_length() - 1) if high else None
+    return below, above
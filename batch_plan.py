@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List
+from container_ship import ContainerShip
+from astar import a_star_search
+from anytime_search import anytime_search
+from manifestExporter import save_manifest
+from shipVisuals import loadManifest, renderPlan
+from manifestParser import load_manifest
+from plan_cache import PlanCache, cached_plan
+from search_stats import SearchStats
+
+#headless counterpart of main.py: plans a whole directory of manifests (or a list of paths on stdin)
+#across a process pool, without prompts, and writes for every manifest
+#    <ship>_plan.json      moves, crane minutes (crane_minutes without the PARK legs, park_minutes for the two
+#                          PARK legs, total_minutes for both), planner, timing and search stats
+#    <ship>_OUTBOUND.txt   the manifest after the plan, same format as the operator flow writes
+#    <ship>_steps.txt      the bay at every step of the plan, as the operator would see it
+#one JSON line per manifest is also printed to stdout so runs can be piped into other tools.
+#
+#usage: python batch_plan.py manifests/ --out plans/ --workers 8 --planner anytime --time-limit 30 --cache plans.sqlite
+
+def collect_manifests(source: str) -> List[str]:
+    if source == "-":
+        return [line.strip() for line in sys.stdin if line.strip()]
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source) if name.endswith(".txt"))
+    return [source]
+
+#plans one manifest in a worker process and returns the summary written to <ship>_plan.json
+def plan_manifest(path: str, out_dir: str, planner: str, time_limit: float, max_expansions: int,
+                  cache_path: str = None) -> dict:
+    ship_name = os.path.basename(path).replace(".txt", "")
+    started = time.perf_counter()
+    summary = {"manifest": path, "ship": ship_name, "planner": planner}
+    try:
+        manifest = load_manifest(path)
+        ship = ContainerShip(manifest)
+        stats = SearchStats()
+
+        def run_planner(s):
+            if planner == "astar":
+                return a_star_search(s, max_expansions=max_expansions, stats=stats) + (1.0,)
+            return anytime_search(s, time_limit=time_limit, stats=stats)
+
+        cache = PlanCache(cache_path) if cache_path else None
+        try:
+            moves, crane_minutes, num_moves, bound = cached_plan(cache, ship, run_planner)
+        finally:
+            if cache is not None:
+                cache.close()
+        summary["plan_seconds"] = round(time.perf_counter() - started, 4)
+        summary["cache_hit"] = stats.planner is None
+        if stats.planner is not None:
+            summary["expansions"] = stats.expansions
+            summary["stats"] = stats.as_dict()
+
+        if moves is None:
+            summary["status"] = "no_plan"
+            return summary
+
+        park_minutes = 0
+        if moves:
+            park_minutes = (ship.calculate_park_to_position_cost(moves[0].start_pos)
+                            + ship.calculate_position_to_park_cost(moves[-1].end_pos))
+
+        #replay onto the ship to produce the OUTBOUND manifest (descriptions come from its registry)
+        final_ship = ship
+        for m in moves:
+            final_ship = final_ship.perform_move(m.start_pos, m.end_pos, m.container_weight)
+        outbound = save_manifest(final_ship, moves, os.path.join(out_dir, f"{ship_name}_OUTBOUND.txt"))
+        steps = renderPlan(loadManifest(ship.registry), moves, os.path.join(out_dir, f"{ship_name}_steps.txt"))
+
+        summary.update({
+            "status": "ok",
+            "moves": [{"from": list(m.start_pos), "to": list(m.end_pos), "weight": m.container_weight,
+                       "minutes": m.cost} for m in moves],
+            "num_moves": num_moves,
+            "crane_minutes": crane_minutes,
+            "park_minutes": park_minutes,
+            "total_minutes": crane_minutes + park_minutes,
+            "bound": bound,
+            "outbound": outbound,
+            "steps": steps,
+        })
+    except Exception as e:
+        summary["status"] = "error"
+        summary["error"] = str(e)
+    finally:
+        summary["total_seconds"] = round(time.perf_counter() - started, 4)
+        with open(os.path.join(out_dir, f"{ship_name}_plan.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return summary
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Plan every manifest in a directory without prompts.")
+    parser.add_argument("source", help="manifest directory, a single manifest, or - to read paths from stdin")
+    parser.add_argument("--out", default="plans", help="directory for the plan JSON and OUTBOUND manifests")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--planner", choices=["anytime", "astar"], default="anytime")
+    parser.add_argument("--time-limit", type=float, default=30.0, help="seconds per manifest (anytime planner)")
+    parser.add_argument("--max-expansions", type=int, default=200000, help="node budget (astar planner)")
+    parser.add_argument("--cache", default=None, help="sqlite plan cache shared by all workers")
+    args = parser.parse_args(argv)
+
+    manifests = collect_manifests(args.source)
+    os.makedirs(args.out, exist_ok=True)
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(plan_manifest, path, args.out, args.planner, args.time_limit, args.max_expansions,
+                               args.cache)
+                   for path in manifests]
+        for future in as_completed(futures):
+            summary = future.result()
+            if summary["status"] != "ok":
+                failures += 1
+            print(json.dumps({k: v for k, v in summary.items() if k not in ("moves", "stats")}), flush=True)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
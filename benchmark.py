@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, Optional
+from container_ship import ContainerShip
+from manifestParser import load_manifest
+from astar import a_star_search
+from search_stats import SearchStats
+from manifest_generator import SCENARIOS, generate_manifest, write_manifest
+
+#search benchmark over the generated scenarios. every run is appended as one JSON line to the results file
+#and compared against the previous run with the same seed and expansion budget, so a slowdown or a worse
+#plan shows up as soon as it is introduced.
+#
+#usage: python benchmark.py --seed 0 --max-expansions 3000 --results bench_results.jsonl
+DEFAULT_RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_results.jsonl")
+
+#relative change that counts as a regression when comparing runs (timings are noisy below this)
+REGRESSION_THRESHOLD = 0.25
+
+#searches finishing faster than this are too short to time reliably
+MIN_TIMED_SECONDS = 0.05
+
+#metrics where a bigger number is worse
+LOWER_IS_BETTER = ("astar_seconds", "astar_peak_kib", "astar_cost", "ship_setup_us", "valid_moves_us")
+
+#average microseconds per call of fn, repeated for at least min_seconds
+def time_per_call(fn, min_seconds: float = 0.2) -> float:
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1e6
+
+def bench_manifest(path: str, max_expansions: int, measure_memory: bool = True) -> Dict[str, float]:
+    manifest = load_manifest(path)
+    ship = ContainerShip(manifest)
+    result = {"containers": sum(1 for row in ship.grid for w in row if w > 0)}
+
+    stats = SearchStats()
+    moves, cost, _ = a_star_search(ship, max_expansions=max_expansions, stats=stats)
+    seconds = stats.wall_seconds
+    result.update({
+        "astar_seconds": round(seconds, 4),
+        "astar_expansions": stats.expansions,
+        "astar_generated": stats.generated,
+        "astar_expansions_per_sec": round(stats.expansions / seconds, 1) if seconds > 0 else 0.0,
+        "astar_cost": cost if moves is not None else None,
+    })
+
+    #tracemalloc slows the search down a lot, so the peak comes from a second, untimed run
+    if measure_memory:
+        tracemalloc.start()
+        a_star_search(ship, max_expansions=max_expansions)
+        result["astar_peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+
+    #building a ship from a parsed manifest, which is where the minimum imbalance is solved
+    result["ship_setup_us"] = round(time_per_call(lambda: ContainerShip(manifest).min_possible_imbalance), 2)
+    result["valid_moves_us"] = round(time_per_call(ship.get_valid_moves), 2)
+    return result
+
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+def run_suite(seed: int, max_expansions: int, work_dir: str, measure_memory: bool = True) -> dict:
+    os.makedirs(work_dir, exist_ok=True)
+    cases = {}
+    for scenario in SCENARIOS:
+        path = write_manifest(os.path.join(work_dir, f"{scenario.name}_{seed}.txt"), generate_manifest(scenario, seed))
+        cases[scenario.name] = bench_manifest(path, max_expansions, measure_memory)
+        print(f"{scenario.name:18s} {json.dumps(cases[scenario.name])}", flush=True)
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "seed": seed,
+        "max_expansions": max_expansions,
+        "cases": cases,
+    }
+
+#last stored run with the same seed and budget, or None
+def previous_run(results_path: str, seed: int, max_expansions: int) -> Optional[dict]:
+    if not os.path.exists(results_path):
+        return None
+    last = None
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except ValueError:
+                continue
+            if run.get("seed") == seed and run.get("max_expansions") == max_expansions:
+                last = run
+    return last
+
+#prints the relative change of every metric and returns the number of regressions
+def compare(previous: dict, current: dict, threshold: float = REGRESSION_THRESHOLD) -> int:
+    regressions = 0
+    print(f"\ncompared with {previous.get('revision') or 'unknown revision'} ({previous.get('timestamp')})")
+    for name, metrics in current["cases"].items():
+        old = previous["cases"].get(name)
+        if old is None:
+            continue
+        for metric in LOWER_IS_BETTER:
+            before, after = old.get(metric), metrics.get(metric)
+            if metric == "astar_cost" and before is not None and after is None:
+                print(f"  {name:18s} no plan within the budget any more  REGRESSION")
+                regressions += 1
+                continue
+            if before is None or after is None:
+                continue
+            if metric == "astar_seconds" and max(before, after) < MIN_TIMED_SECONDS:
+                continue
+            change = (after - before) / before if before else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"  {name:18s} {metric:16s} {before:>12} -> {after:>12} ({change:+.1%}){flag}")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the planner on generated manifests.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-expansions", type=int, default=3000)
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSON lines file the runs are appended to")
+    parser.add_argument("--work-dir", default=os.path.join("plans", "bench_manifests"))
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.seed, args.max_expansions, args.work_dir, not args.no_memory)
+    previous = previous_run(args.results, args.seed, args.max_expansions)
+    with open(args.results, "a", encoding="utf-8") as f:
+        f.write(json.dumps(current) + "\n")
+
+    if previous is None:
+        print("\nno previous run to compare with")
+        return 0
+    regressions = compare(previous, current)
+    return 1 if regressions and args.fail_on_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
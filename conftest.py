@@ -0,0 +1,64 @@
+import random
+import pytest
+from container_ship import ContainerShip, MAX_ROWS, MAX_COLS
+from manifestParser import ManifestEntry, parse_manifest_text
+from manifest_generator import entries_text, layout_text
+
+#shared test setup: the slow marker and the bays used by several test modules. manifest_generator.manifest_text gives the seeded scenario manifests
+
+#tests marked slow (the ones that need the full pattern database) only run with --runslow
+def pytest_addoption(parser):
+    parser.addoption("--runslow", action="store_true", help="also run the tests marked slow")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: takes minutes (or a built pattern database), run with --runslow")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runslow"):
+        return
+    skip = pytest.mark.skip(reason="slow, run with --runslow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+SMALL_SEEDS = range(24)
+
+#every slot full except the top of the last column: 100s on port, 1s on starboard.
+#only one slot is ever free, so everything below the top row is stuck where it is
+@pytest.fixture(scope="session")
+def nearly_full_text():
+    weights = {(r, c): 100 if c <= MAX_COLS // 2 else 1
+               for r in range(1, MAX_ROWS + 1) for c in range(1, MAX_COLS + 1)}
+    del weights[(MAX_ROWS, MAX_COLS)]
+    return layout_text(weights)
+
+#{seed: parsed manifest} of small seeded bays that are not balanced yet: a few stacks of random weights,
+#sometimes on a NAN corner, kept small so plain UCS stays quick
+@pytest.fixture(scope="session")
+def small_bays():
+    return {seed: _small_bay(random.Random(seed)) for seed in SMALL_SEEDS}
+
+def _small_bay(rng):
+    while True:
+        manifest = _draw_bay(rng)
+        if not ContainerShip(manifest).is_goal():
+            return manifest
+
+def _draw_bay(rng):
+    floors = [1 if rng.random() < 0.2 else 0 for _ in range(MAX_COLS)]
+    stacks = {c: [] for c in range(MAX_COLS)}
+    for _ in range(rng.randint(3, 6)):
+        #mostly on port, so the plan has to cross the keel
+        c = rng.randrange(MAX_COLS // 2) if rng.random() < 0.7 else rng.randrange(MAX_COLS)
+        if floors[c] + len(stacks[c]) < 3:
+            stacks[c].append(rng.randint(1, 99))
+    entries = []
+    for r in range(MAX_ROWS):
+        for c in range(MAX_COLS):
+            if r < floors[c]:
+                entries.append(ManifestEntry((r + 1, c + 1), 0, "NAN"))
+            elif r - floors[c] < len(stacks[c]):
+                entries.append(ManifestEntry((r + 1, c + 1), stacks[c][r - floors[c]], "Box"))
+            else:
+                entries.append(ManifestEntry((r + 1, c + 1), 0, "UNUSED"))
+    return parse_manifest_text(entries_text(entries))
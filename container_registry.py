@@ -0,0 +1,70 @@
+from collections import namedtuple
+from typing import Iterable, List, Optional, Tuple
+from manifestParser import Manifest, ManifestEntry
+
+#one registered container: id (1-based, manifest order), where it starts (1-indexed), its weight and description
+Container = namedtuple('Container', ['id', 'position', 'weight', 'description'])
+
+#every container of a manifest, registered once when the ship is built and never changed afterwards.
+#search states only carry weights, so no description string is copied per successor; who is where is
+#worked out from the chosen plan by replaying its moves on the id layout (ids_after) when the OUTBOUND
+#manifest or the visual grid is produced.
+class ContainerRegistry:
+    __slots__ = ('containers', 'start_ids', 'nan_slots', 'rows', 'cols')
+
+    def __init__(self, manifest: Manifest, rows: int, cols: int):
+        containers = []
+        ids = [[0] * cols for _ in range(rows)]
+        nan_slots = set()
+        for (r, c), weight, desc in manifest.entries:
+            if not (1 <= r <= rows and 1 <= c <= cols):
+                continue
+            if weight > 0:
+                containers.append(Container(len(containers) + 1, (r, c), weight, desc))
+                ids[r - 1][c - 1] = len(containers)
+            else:
+                ids[r - 1][c - 1] = 0
+                if desc == "NAN":
+                    nan_slots.add((r, c))
+                else:
+                    nan_slots.discard((r, c))
+        self.containers: Tuple[Container, ...] = tuple(containers)
+        self.start_ids = tuple(tuple(row) for row in ids)
+        self.nan_slots = frozenset(nan_slots)
+        self.rows = rows
+        self.cols = cols
+
+    def __len__(self) -> int:
+        return len(self.containers)
+
+    def get(self, container_id: int) -> Optional[Container]:
+        return self.containers[container_id - 1] if container_id > 0 else None
+
+    #0-indexed grid of container ids (0 = no container) after applying moves to the manifest layout
+    def ids_after(self, moves: Iterable = ()) -> List[List[int]]:
+        ids = [list(row) for row in self.start_ids]
+        for move in moves:
+            (r1, c1), (r2, c2) = move.start_pos, move.end_pos
+            moved = ids[r1 - 1][c1 - 1]
+            if moved == 0:
+                raise ValueError(f"No container at {move.start_pos} to move")
+            ids[r1 - 1][c1 - 1] = 0
+            ids[r2 - 1][c2 - 1] = moved
+        return ids
+
+    #the label the manifest uses for an empty slot
+    def empty_label(self, position: Tuple[int, int]) -> str:
+        return "NAN" if position in self.nan_slots else "UNUSED"
+
+    #every slot of the manifest, row-major, after the moves: what save_manifest writes
+    def entries_after(self, moves: Iterable = ()) -> List[ManifestEntry]:
+        ids = self.ids_after(moves)
+        entries = []
+        for r in range(1, self.rows + 1):
+            for c in range(1, self.cols + 1):
+                container = self.get(ids[r - 1][c - 1])
+                if container is None:
+                    entries.append(ManifestEntry((r, c), 0, self.empty_label((r, c))))
+                else:
+                    entries.append(ManifestEntry((r, c), container.weight, container.description))
+        return entries
@@ -1,22 +1,84 @@
-from collections import namedtuple, deque
-from typing import List, Tuple, Optional, Dict, Set
-from manifestParser import ManifestParser
+import hashlib
+import random
+from collections import namedtuple
+from typing import List, Tuple, Optional, Dict
+from manifestParser import Manifest, load_manifest
+from container_registry import ContainerRegistry
+from balance_solver import BalanceSolver
+from move_matrix import move_tables
 
 MAX_ROWS = 8
 MAX_COLS = 12
 
+#manifest weights are at most 5 digits (99999 < 2**17) so every cell fits in 17 bits of the packed key
+CELL_BITS = 17
+
 #this will be use to make stores and print easily
 ContainerMove = namedtuple('ContainerMove',['start_pos','end_pos','container_weight','cost'])
 
+#moves packed into one small int: weight (17 bits) | cost (8 bits) | start row, start col, end row, end col (4 bits each)
+def pack_move(move: ContainerMove) -> int:
+    return ((move.container_weight << 24) | (move.cost << 16)
+            | (move.start_pos[0] << 12) | (move.start_pos[1] << 8) | (move.end_pos[0] << 4) | move.end_pos[1])
+
+def unpack_move(packed: int) -> ContainerMove:
+    return ContainerMove(((packed >> 12) & 0xF, (packed >> 8) & 0xF), ((packed >> 4) & 0xF, packed & 0xF),
+                         packed >> 24, (packed >> 16) & 0xFF)
+
+#columns a move sweeps over (1-indexed, inclusive). a move's cost and legality only depend on the
+#heights inside its span, so two moves with disjoint spans commute: either order costs the same and
+#reaches the same ship
+def move_span(move: ContainerMove) -> Tuple[int, int]:
+    c1 = move.start_pos[1]
+    c2 = move.end_pos[1]
+    return (c1, c2) if c1 < c2 else (c2, c1)
+
+#zobrist tables are built lazily per weight and seeded by the weight itself,
+#so equal weights share keys and every process derives the exact same hashes
+_zobrist_tables: Dict[int, List[int]] = {}
+
+def zobrist_table(weight: int) -> List[int]:
+    table = _zobrist_tables.get(weight)
+    if table is None:
+        rng = random.Random(weight)
+        table = [rng.getrandbits(64) for _ in range(MAX_ROWS * MAX_COLS)]
+        _zobrist_tables[weight] = table
+    return table
+
+#compact hashable snapshot of a ship layout used as the closed-set key during search.
+#packed holds every cell weight in CELL_BITS bits (row-major) so equality is one int compare,
+#and zobrist is the precomputed hash so dict lookups never rehash the layout.
+#only weights go into the key (never descriptions), so swapping two containers of equal weight
+#is the same state: interchangeable containers are already collapsed into one search node.
+class ShipKey:
+    __slots__ = ('packed', 'zobrist')
+
+    def __init__(self, packed: int, zobrist: int):
+        self.packed = packed
+        self.zobrist = zobrist
+
+    def __hash__(self) -> int:
+        return self.zobrist
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ShipKey) and self.packed == other.packed
+
+    def __repr__(self):
+        return f"ShipKey({self.zobrist:016x})"
+
 class ContainerShip:
-    def __init__(self, manifest_file: str): 
+    #slots keep every search state small since A* holds hundreds of thousands of them
+    __slots__ = ('grid', 'total_weight', 'port_weight', 'starboard_weight', 'max_row', 'max_col',
+                 'original_total_weight', 'registry', 'packed_key', 'zobrist',
+                 'nan_mask', 'floors', 'heights', 'balance')
+
+    #manifest_file is a path or an already loaded Manifest (shared with the visualizer and exporter)
+    def __init__(self, manifest_file): 
         #initialize the ship with the manifest file
-        parser = ManifestParser()
-        manifest_entries = parser.parse_manifest(manifest_file)
+        manifest = manifest_file if isinstance(manifest_file, Manifest) else load_manifest(manifest_file)
 
         # keep (row, col, weight, description) tuples
-        manifest_data = [(pos[0], pos[1], weight, desc) for pos, weight, desc in manifest_entries]
-
+        manifest_data = [(pos[0], pos[1], weight, desc) for pos, weight, desc in manifest.entries]
 
         #initialize grid/weights
         self.grid = [[0 for _ in range(MAX_COLS)] for _ in range(MAX_ROWS)]
@@ -29,35 +91,118 @@ class ContainerShip:
         #saves original total weight (Po + So) for legal threshold
         self.original_total_weight: int = 0
 
-        #cache for minial possible imbalance (computed on demand)
-        self.min_possible_imbalance: Optional[int] = None
+        #descriptions live in the registry, shared by every derived state; the states themselves only carry weights
+        self.registry = ContainerRegistry(manifest, MAX_ROWS, MAX_COLS)
+
+        #packed layout and zobrist hash, both updated in O(1) by perform_move
+        self.packed_key = 0
+        self.zobrist = 0
 
-        #metadata grid stores description/labels (e.g., UNUSED, NAN, cargo description)
-        self.metadata = [["UNUSED" for _ in range(MAX_COLS)] for _ in range(MAX_ROWS)]
+        #NAN slots never change, so the mask and per-column floors are shared by every derived state
+        self.nan_mask = [[False for _ in range(MAX_COLS)] for _ in range(MAX_ROWS)]
+        self.floors = [0] * MAX_COLS
+
+        #heights[c] = 0-indexed row of the next empty slot in column c (containers and NAN both count)
+        self.heights = [0] * MAX_COLS
 
         #to produce the grid
         self.parse_manifest(manifest_data)
+        self._build_column_index()
 
         #store original total after initial parse
         self.original_total_weight = self.total_weight
 
+        #partition DP shared by every state derived from this manifest
+        self.balance = self._build_balance_solver()
+
     #created this function to make the tuple of tuples unchangleable(so i can compare the ship for search algorithms)
     def grid_tuple(self):
         return tuple(tuple(row) for row in self.grid)
+
+    #compact key for visited sets, much cheaper to build/hash/store than grid_tuple()
+    def state_key(self) -> ShipKey:
+        return ShipKey(self.packed_key, self.zobrist)
+
+    #stable digest of the layout (container weights plus NAN slots), identical across runs and processes.
+    #two manifests with the same fingerprint are the same planning problem
+    def fingerprint(self) -> str:
+        nan_bits = 0
+        for r in range(MAX_ROWS):
+            for c in range(MAX_COLS):
+                if self.nan_mask[r][c]:
+                    nan_bits |= 1 << (r * MAX_COLS + c)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.packed_key.to_bytes(MAX_ROWS * MAX_COLS * CELL_BITS // 8 + 1, "little"))
+        digest.update(nan_bits.to_bytes(MAX_ROWS * MAX_COLS // 8, "little"))
+        return digest.hexdigest()
+
+    #adds (or removes, since xor/sub undo each other) a weight at a 0-indexed cell in the packed key and hash
+    def _toggle_cell_key(self, r0: int, c0: int, weight: int, add: bool = True):
+        if weight == 0:
+            return
+        idx = r0 * MAX_COLS + c0
+        self.zobrist ^= zobrist_table(weight)[idx]
+        if add:
+            self.packed_key += weight << (idx * CELL_BITS)
+        else:
+            self.packed_key -= weight << (idx * CELL_BITS)
     
-    #finds the top container within the column
+    #finds the top container within the column (NAN slots are part of the hull, not containers)
     def get_top_container(self,col: int)-> Tuple[Optional[Tuple[int, int]], int]:
-        for r in range(MAX_ROWS - 1, -1, -1):
-            if self.grid[r][col] != 0:
-                return (r+1, col + 1), self.grid[r][col]
+        h = self.heights[col]
+        if h > self.floors[col]:
+            return (h, col + 1), self.grid[h - 1][col]
         return None, 0
 
     #finds the first empty slot from the bottom up in a column  
     def get_next_empty(self,col: int)-> Optional[Tuple[int, int]]:
-        for r in range(MAX_ROWS):
-            if self.grid[r][col] == 0:
-                return (r+1, col + 1)
+        h = self.heights[col]
+        if h < MAX_ROWS:
+            return (h + 1, col + 1)
         return None
+
+    #builds the static NAN floors and the column heights once the grid has been parsed
+    def _build_column_index(self):
+        for c in range(MAX_COLS):
+            floor = 0
+            height = 0
+            for r in range(MAX_ROWS):
+                if self.nan_mask[r][c]:
+                    floor = r + 1
+                    height = r + 1
+                elif self.grid[r][c] != 0:
+                    height = r + 1
+            self.floors[c] = floor
+            self.heights[c] = height
+        self.nan_mask = tuple(tuple(row) for row in self.nan_mask)
+        self.floors = tuple(self.floors)
+
+    #collects movable weights and usable slots per side for the partition DP.
+    #lifting a container needs every slot above it in its column empty plus one free slot in another column,
+    #and the number of free slots never changes, so a container deeper than the ship's free slots can never
+    #move: it stays on its side and keeps its slot, like one stuck under a NAN slot
+    def _build_balance_solver(self) -> BalanceSolver:
+        left_half = MAX_COLS // 2
+        containers = sum(1 for c in range(MAX_COLS) for r in range(self.floors[c], MAX_ROWS) if self.grid[r][c])
+        free = sum(MAX_ROWS - f for f in self.floors) - containers
+        weights = []
+        slots = [0, 0] #port, starboard
+        fixed = [0, 0]
+        for c in range(MAX_COLS):
+            side = 0 if c < left_half else 1
+            slots[side] += MAX_ROWS - self.floors[c]
+            for r in range(MAX_ROWS):
+                w = self.grid[r][c]
+                if w == 0:
+                    continue
+                if r < self.floors[c]:
+                    fixed[side] += w #stuck under a NAN slot
+                elif MAX_ROWS - r > free:
+                    fixed[side] += w #buried too deep to ever be dug out
+                    slots[side] -= 1
+                else:
+                    weights.append(w)
+        return BalanceSolver(weights, slots[0], slots[1], fixed[0], fixed[1])
     
     #places the data into each grid within the ship
     def parse_manifest(self, manifest_data: List[Tuple[int, int, int, str]]):
@@ -67,9 +212,10 @@ class ContainerShip:
             if 0 <= r0 < MAX_ROWS and 0 <= c0 < MAX_COLS:
                 if self.grid[r0][c0] != 0:
                     # silently override if container already exists
-                    pass
+                    self._toggle_cell_key(r0, c0, self.grid[r0][c0], add=False)
                 self.grid[r0][c0] = w
-                self.metadata[r0][c0] = desc if desc else ("UNUSED" if w == 0 else "")
+                self._toggle_cell_key(r0, c0, w)
+                self.nan_mask[r0][c0] = (w == 0 and desc == "NAN")
                 self.total_weight += w
                 if c0 < (MAX_COLS // 2):
                     self.port_weight +=w
@@ -79,18 +225,13 @@ class ContainerShip:
 
     #to check if there is nothing above the cur container(will be used for horizontal sliding)
     def is_exposed(self,row_idx: int, col_idx: int)-> bool:
-        if self.grid[row_idx][col_idx] == 0:
-            return False
-        for rr in range(row_idx + 1, MAX_ROWS):
-            if self.grid[rr][col_idx] != 0:
-                return False
-        return True
+        return self.grid[row_idx][col_idx] != 0 and row_idx == self.heights[col_idx] - 1
     
-    #to check whether its the first container or has a container below it
+    #to check whether its the first container or has a container (or NAN hull slot) below it
     def is_supported(self,row_idx: int, col_idx: int) -> bool:
         if row_idx == 0:
             return True
-        return self.grid[row_idx - 1][col_idx] != 0 
+        return self.grid[row_idx - 1][col_idx] != 0 or self.nan_mask[row_idx - 1][col_idx]
     
     #returns the |Pr-Sr|
     def get_balance_difference(self)-> int:
@@ -103,21 +244,12 @@ class ContainerShip:
         r1, c1 = start_pos
         r2, c2 = end_pos
 
-        # Convert to 0-indexed
-        r1_idx, c1_idx = r1 - 1, c1 - 1
-        r2_idx, c2_idx = r2 - 1, c2 - 1
-
         # Find the highest obstacle in the path (including start and end columns)
-        min_col = min(c1_idx, c2_idx)
-        max_col = max(c1_idx, c2_idx)
-        
-        max_height = 0
-        for col in range(min_col, max_col + 1):
-            # Find the top occupied row in this column
-            for row in range(MAX_ROWS - 1, -1, -1):
-                if self.grid[row][col] != 0:
-                    max_height = max(max_height, row + 1)  # +1 to convert to 1-indexed height
-                    break
+        # heights are already 1-indexed tops, so this is a range max over the column index
+        if c1 < c2:
+            max_height = max(self.heights[c1 - 1:c2])
+        else:
+            max_height = max(self.heights[c2 - 1:c1])
         
         # Crane must go up to clear the tallest obstacle + 1
         clear_height = max_height + 1
@@ -159,10 +291,8 @@ class ContainerShip:
         horizontal = abs(c - park_col)
         return up_to_park + horizontal
     
-    #this will return a new ContainerShip state after moving the container at start_pos to end_pos
-
-    def perform_move(self,start_pos: Tuple[int, int], end_pos: Tuple[int,int], weight: int)-> 'ContainerShip':
-        #we create a copy so that the new move does not modify the orginial ship aka self.grid
+    #makes an independent copy of this ship (static NAN data is shared, mutable state is duplicated)
+    def copy(self) -> 'ContainerShip':
         new_ship = ContainerShip.__new__(ContainerShip)
         new_ship.grid = [row[:] for row in self.grid]
         new_ship.total_weight = self.total_weight
@@ -171,44 +301,99 @@ class ContainerShip:
         new_ship.max_row = self.max_row
         new_ship.max_col = self.max_col
         new_ship.original_total_weight = self.original_total_weight
-        new_ship.min_possible_imbalance = None  # computed on demand
-        new_ship.metadata = [row[:] for row in self.metadata]
+        new_ship.balance = self.balance
+        new_ship.registry = self.registry
+        new_ship.packed_key = self.packed_key
+        new_ship.zobrist = self.zobrist
+        new_ship.nan_mask = self.nan_mask
+        new_ship.floors = self.floors
+        new_ship.heights = self.heights[:]
+        return new_ship
+
+    #rebuilds a state of this manifest from a packed layout (e.g. one sent between worker processes).
+    #the static NAN data and the balance solver are shared with self, everything else is decoded from packed
+    def from_packed(self, packed: int) -> 'ContainerShip':
+        ship = self.copy()
+        cell_mask = (1 << CELL_BITS) - 1
+        left_half = MAX_COLS // 2
+        ship.packed_key = 0
+        ship.zobrist = 0
+        ship.port_weight = 0
+        ship.starboard_weight = 0
+        for r in range(MAX_ROWS):
+            for c in range(MAX_COLS):
+                w = (packed >> ((r * MAX_COLS + c) * CELL_BITS)) & cell_mask
+                ship.grid[r][c] = w
+                ship._toggle_cell_key(r, c, w)
+                if w:
+                    if c < left_half:
+                        ship.port_weight += w
+                    else:
+                        ship.starboard_weight += w
+        for c in range(MAX_COLS):
+            height = self.floors[c]
+            for r in range(MAX_ROWS - 1, height - 1, -1):
+                if ship.grid[r][c] != 0:
+                    height = r + 1
+                    break
+            ship.heights[c] = height
+        ship.total_weight = ship.port_weight + ship.starboard_weight
+        return ship
+
+    #this will return a new ContainerShip state after moving the container at start_pos to end_pos
 
+    def perform_move(self,start_pos: Tuple[int, int], end_pos: Tuple[int,int], weight: int)-> 'ContainerShip':
         r1,c1 = start_pos[0] - 1, start_pos[1] -1
         r2,c2 = end_pos[0] - 1, end_pos[1] -1
 
         #test cases
-        if new_ship.grid[r1][c1] != weight:
+        if self.grid[r1][c1] != weight:
             raise ValueError(f"Attempted to move but start cell ({start_pos}) doesnt contain the given weight")
-        if new_ship.grid[r2][c2] != 0:
+        if self.grid[r2][c2] != 0 or self.nan_mask[r2][c2]:
             raise ValueError("Attempted to move into a non-empty slot")
-        
+        if r1 != self.heights[c1] - 1:
+            raise ValueError(f"Attempted to move a container that is not on top of its column ({start_pos})")
+        if r2 != self.heights[c2]:
+            raise ValueError(f"Attempted to move into an unsupported slot ({end_pos})")
+
+        #we create a copy so that the new move does not modify the orginial ship aka self.grid
+        new_ship = self.copy()
+        new_ship.make_move(ContainerMove(start_pos, end_pos, weight, 0))
+        return new_ship
+
+    """
+    In-place make/unmake used inside the search loop.
+    make_move applies an already validated move (from get_candidate_moves) to this ship without copying anything,
+    and unmake_move restores the exact previous state, so A* can hash/score a successor and only copy it if it gets queued.
+    """
+    def make_move(self, move: ContainerMove):
+        r1, c1 = move.start_pos[0] - 1, move.start_pos[1] - 1
+        r2, c2 = move.end_pos[0] - 1, move.end_pos[1] - 1
+        weight = move.container_weight
+
         #excecutes the move
-        new_ship.grid[r1][c1] = 0
-        new_ship.grid[r2][c2] = weight
-
-        # Move metadata (container description or NAN marker) along with the container
-        start_meta = new_ship.metadata[r1][c1]
-        new_ship.metadata[r1][c1] = "UNUSED"  # Source becomes empty
-        # Copy metadata (including NAN markers) to destination, default to UNUSED if None
-        if start_meta is not None:
-            new_ship.metadata[r2][c2] = start_meta
-        else:
-            new_ship.metadata[r2][c2] = "UNUSED"
+        self.grid[r1][c1] = 0
+        self.grid[r2][c2] = weight
+        self._toggle_cell_key(r1, c1, weight, add=False)
+        self._toggle_cell_key(r2, c2, weight)
+        self.heights[c1] = r1
+        self.heights[c2] = r2 + 1
 
         left_half = (MAX_COLS // 2)  # columns 0..left_half-1 are port
         start_is_port = (c1 < left_half)
         end_is_port = (c2 < left_half)
         if start_is_port and not end_is_port:
-            new_ship.port_weight -= weight
-            new_ship.starboard_weight += weight
+            self.port_weight -= weight
+            self.starboard_weight += weight
         elif not start_is_port and end_is_port:
-            new_ship.starboard_weight -= weight
-            new_ship.port_weight += weight
+            self.starboard_weight -= weight
+            self.port_weight += weight
 
-        #returns newship
-        new_ship.total_weight = new_ship.port_weight + new_ship.starboard_weight
-        return new_ship
+        self.total_weight = self.port_weight + self.starboard_weight
+
+    #moving the container straight back is the exact inverse of make_move
+    def unmake_move(self, move: ContainerMove):
+        self.make_move(ContainerMove(move.end_pos, move.start_pos, move.container_weight, move.cost))
     
     #This gives us the sliding feature
     """
@@ -229,21 +414,24 @@ class ContainerShip:
 
         start_pos = (row_idx + 1, col_idx + 1)
 
+        #a column blocks the row once its height passes it, and supports a slide when its height equals it
+        heights = self.heights
+
         #scan LEFT until blocked - add ALL valid positions, not just the furthest
         c = col_idx - 1
         while c >= 0:
-            if self.grid[row_idx][c] != 0:
+            if heights[c] > row_idx:
                 break  # blocked
-            if self.is_supported(row_idx, c):
+            if heights[c] == row_idx:
                 results.append((start_pos, (row_idx + 1, c + 1), weight))
             c -= 1
 
         #scan RIGHT until blocked - add ALL valid positions, not just the furthest
         c = col_idx + 1
         while c < self.max_col:
-            if self.grid[row_idx][c] != 0:
+            if heights[c] > row_idx:
                 break
-            if self.is_supported(row_idx, c):
+            if heights[c] == row_idx:
                 results.append((start_pos, (row_idx + 1, c + 1), weight))
             c += 1
 
@@ -251,98 +439,72 @@ class ContainerShip:
     
     #this will get the valid moves 
     """
-    Generate all legal single-container moves from current state:
+    Generate all legal single-container moves from current state without building any new ships:
         - Crane pick-and-place moves (only top container of a column -> top empty slot of another column)
-        - Horizontal sliding moves (as per get_horizontal_slides_from_cell) with cost=0
-    Returns list of tuples: (new_ship, ContainerMove)
+        - Horizontal sliding moves (as per get_horizontal_slides_from_cell) costing the horizontal distance
+    Returns list of ContainerMove, ready for make_move/unmake_move or perform_move.
     """
-    def get_valid_moves(self):
+    def get_candidate_moves(self) -> List[ContainerMove]:
         moves = []
 
+        #top containers and next empty slots are O(1) lookups, so collect them once per expansion
+        tops = [self.get_top_container(c) for c in range(self.max_col)]
+        empties = [self.get_next_empty(c) for c in range(self.max_col)]
+
+        #every crane and slide cost of this state in one pass over the heights (see move_matrix)
+        tables = move_tables(self.heights, self.floors)
+
         # 1)This gives us the valid crane moves (aka only top containers)
         for start_col in range(self.max_col):
-            start_pos, weight = self.get_top_container(start_col)
+            start_pos, weight = tops[start_col]
             if not start_pos:
                 continue
+            costs = tables.crane[start_col]
             for end_col in range(self.max_col):
-                if end_col == start_col:
-                    continue
-                end_pos = self.get_next_empty(end_col)
-                if not end_pos:
-                    continue
-                cost = self.calculate_move_cost(start_pos, end_pos, slide=False)
-                new_ship = self.perform_move(start_pos, end_pos, weight)
-                move_obj = ContainerMove(start_pos, end_pos, weight, cost)
-                moves.append((new_ship, move_obj))
-
-        # 2)This gives us the Horizontal sliding moves (scans every cell)
-        for r in range(self.max_row):
-            for c in range(self.max_col):
-                if self.grid[r][c] == 0:
-                    continue
-                # get potential slides from this exposed cell
-                slides = self.get_horizontal_slides_from_cell(r, c)
-                for start_pos, end_pos, weight in slides:
-                    # double-check end_pos emptiness & support
-                    er, ec = end_pos
-                    er_idx, ec_idx = er - 1, ec - 1
-                    if self.grid[er_idx][ec_idx] != 0:
-                        continue
-                    new_ship = self.perform_move(start_pos, end_pos, weight)
-                    # Horizontal slides cost the horizontal distance (1 minute per column)
-                    slide_cost = abs(start_pos[1] - end_pos[1])
-                    move_obj = ContainerMove(start_pos, end_pos, weight, slide_cost)
-                    moves.append((new_ship, move_obj))
+                cost = costs[end_col]
+                if cost >= 0:
+                    moves.append(ContainerMove(start_pos, empties[end_col], weight, cost))
+
+        # 2)This gives us the Horizontal sliding moves (only the top container of a column is exposed),
+        # nearest target first to the left, then to the right, like get_horizontal_slides_from_cell
+        for c in range(self.max_col):
+            start_pos, weight = tops[c]
+            if not start_pos:
+                continue
+            costs = tables.slide[c]
+            for end_col in list(range(c - 1, -1, -1)) + list(range(c + 1, self.max_col)):
+                # Horizontal slides cost the horizontal distance (1 minute per column)
+                if costs[end_col] >= 0:
+                    moves.append(ContainerMove(start_pos, (start_pos[0], end_col + 1), weight, costs[end_col]))
 
         return moves
-    
-    #this uses breadth first search exploration of reachable states (unweighted) to find the minimal |Pr-Sr|
-    #its also bounded meaning if it reaches a boundary it just returns the best so far.
-    def compute_min_possible_imbalance(self, max_expansions: int = 200000, threshold: Optional[float] = None) -> int:
-        if self.min_possible_imbalance is not None:
-            return self.min_possible_imbalance
-
-        start_grid = self.grid_tuple()
-        start_diff = abs(self.port_weight - self.starboard_weight)
-        best_diff = start_diff
-
-        visited: Set[Tuple[Tuple[int, ...], ...]] = {start_grid}
-        queue = deque()
-        queue.append(self)
-
-        expansions = 0
-        #BFS loop, keeps exploring while theres still states to explore
-        while queue and expansions < max_expansions:
-            ship = queue.popleft()
-            expansions += 1
-
-            # update best diff
-            diff = abs(ship.port_weight - ship.starboard_weight)
-            if diff < best_diff:
-                best_diff = diff
-                if best_diff == 0:
-                    break
-                # Early exit if we found a state that meets the threshold
-                if threshold is not None and best_diff < threshold:
-                    break
-
-            # expand neighbors (unweighted BFS)
-            for new_ship, _move in ship.get_valid_moves():
-                g = new_ship.grid_tuple()
-                if g in visited:
-                    continue
-                visited.add(g)
-                queue.append(new_ship)
 
-        # cache and return
-        self.min_possible_imbalance = best_diff
-        return best_diff
+    """
+    Same moves as get_candidate_moves, each paired with the materialized successor ship.
+    Returns list of tuples: (new_ship, ContainerMove)
+    """
+    def get_valid_moves(self):
+        moves = []
+        for move in self.get_candidate_moves():
+            new_ship = self.copy()
+            new_ship.make_move(move)
+            moves.append((new_ship, move))
+        return moves
+    
+    #minimal |Pr-Sr| over every arrangement of the movable containers, from the partition DP solved at load
+    #time. every derived state shares the solver and so the answer.
+    @property
+    def min_possible_imbalance(self) -> int:
+        return self.balance.min_imbalance
+
+    def compute_min_possible_imbalance(self) -> int:
+        return self.balance.min_imbalance
     
     """
     Legal goal:
         - If |Pr - Sr| < 0.10 * (Po + So) -> goal (legal threshold using original totals)
         - OR if |Pr - Sr| == minimal possible imbalance among reachable states -> goal
-    This function computes the minimal possible imbalance lazily using compute_min_possible_imbalance().
+    Both checks are O(1) since the minimal imbalance is precomputed per manifest.
     """
     def is_goal(self) -> bool:
         # quick accept if empty ship
@@ -354,11 +516,7 @@ class ContainerShip:
         if diff < threshold:
             return True
 
-        # compute minimal possible imbalance with a smaller expansion limit to avoid hanging
-        # Use a much smaller limit when called from is_goal() to keep it fast
-        # Also pass the threshold so BFS can exit early if it finds a state that meets it
-        min_diff = self.compute_min_possible_imbalance(max_expansions=1000, threshold=threshold)
-        return diff == min_diff
+        return diff == self.min_possible_imbalance
     
     #basic string representation without visual formatting
     def __repr__(self):
@@ -1,12 +1,11 @@
+import math
 from container_ship import ContainerShip, MAX_COLS
+from balance_solver import nearest_sums
 
 #this will take in a containership object as input and returns a float representing the estimated cost to move toward a balanced ship.
 #will also calculate the minimal crane move cost needed to transfer one top container to the lighter side, returms 0 if the ship is already balanced.
 def balance_heuristic(ship: ContainerShip) -> float:
     # heuristic is 0 if already perfectly balanced — use a cheap check here.
-    # Avoid calling `ship.is_goal()` because that may trigger a costly
-    # `compute_min_possible_imbalance()` BFS; the heuristic is called
-    # many times during A* and must be fast.
     if ship.get_balance_difference() == 0:
         return 0.0
     
@@ -54,4 +53,86 @@ def balance_heuristic(ship: ContainerShip) -> float:
                 min_cost = cost
                 found = True
     #return large number so astar knows its expensive  
-    return min_cost if found else 999999
\ No newline at end of file
+    return min_cost if found else 999999
+
+#admissible lower bound built on the partition DP shared through ship.balance.
+#the goal only depends on the port weight, so from the DP we know the nearest goal port weight below
+#and above the current one, i.e. how much weight must at least cross the keel in either direction.
+#moving that weight costs at least the crossing distance of every container that crosses (bound A),
+#and digging a buried container out costs at least one minute per container stacked on it (bound B).
+def partition_heuristic(ship: ContainerShip) -> float:
+    if ship.is_goal():
+        return 0.0
+
+    below, above = nearest_sums(ship.balance.goal_sums, ship.port_weight)
+    best = float('inf')
+    if below is not None:
+        best = min(best, transfer_lower_bound(ship, True, ship.port_weight - below))
+    if above is not None:
+        best = min(best, transfer_lower_bound(ship, False, above - ship.port_weight))
+    if best == float('inf'):
+        return 0.0
+    #crane minutes are whole numbers, so the fractional relaxation can be rounded up
+    return float(math.ceil(best - 1e-9))
+
+#lower bound on the crane minutes needed to move at least `need` weight off one side
+def transfer_lower_bound(ship: ContainerShip, from_port: bool, need: int) -> float:
+    if need <= 0:
+        return 0.0
+    left_half = MAX_COLS // 2
+    cols = range(0, left_half) if from_port else range(left_half, MAX_COLS)
+
+    items = [] #(cross, weight) for every movable container on the source side
+    segments = [] #(weight per minute, weight, minutes) from the per-column dig hulls
+    for c in cols:
+        #columns next to the keel cross in 1 minute, the outermost ones in 6
+        cross = left_half - c if from_port else c - left_half + 1
+        stack = [ship.grid[r][c] for r in range(ship.heights[c] - 1, ship.floors[c] - 1, -1)]
+        if not stack:
+            continue
+        for w in stack:
+            items.append((cross, w))
+
+        #taking everything down to depth k costs at least k moves to clear it plus one crossing.
+        #keep only the upper concave hull so the greedy below is a valid LP relaxation
+        prefix = []
+        running = 0
+        for w in stack:
+            running += w
+            prefix.append(running)
+        prev_cost, prev_weight, k0 = 0, 0, 0
+        while k0 < len(prefix):
+            best_k, best_slope = k0, -1.0
+            for k in range(k0, len(prefix)):
+                slope = (prefix[k] - prev_weight) / (cross + k - prev_cost)
+                if slope >= best_slope:
+                    best_k, best_slope = k, slope
+            gained = prefix[best_k] - prev_weight
+            if gained > 0:
+                segments.append((best_slope, gained, cross + best_k - prev_cost))
+            prev_cost, prev_weight, k0 = cross + best_k, prefix[best_k], best_k + 1
+
+    if sum(w for _, w in items) < need:
+        return float('inf')
+
+    #bound A: fractional knapsack, cheapest crossing minutes per unit of weight first
+    bound_a = 0.0
+    remaining = need
+    for cross, w in sorted(items, key=lambda it: it[0] / it[1] if it[1] else float('inf')):
+        if w >= remaining:
+            bound_a += cross * remaining / w
+            break
+        bound_a += cross
+        remaining -= w
+
+    #bound B: LP relaxation of picking one dig depth per column
+    bound_b = 0.0
+    remaining = need
+    for slope, gained, minutes in sorted(segments, reverse=True):
+        if gained >= remaining:
+            bound_b += remaining / slope
+            break
+        bound_b += minutes
+        remaining -= gained
+
+    return max(bound_a, bound_b)
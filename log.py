@@ -1,44 +1,222 @@
+import atexit
+import json
 import os
+import queue
+import threading
 import time
+from typing import Dict, Optional
 
-class Logger:
+# rotation of the JSONL audit stream (logs/events.jsonl): whichever limit is reached first
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_ROTATE_SECONDS = 24 * 60 * 60
+LOG_KEEP = 10 # rotated event files kept, oldest deleted first
+
+# written lines are flushed to the OS right away but only fsynced this often (and on close)
+FSYNC_INTERVAL = 1.0
+
+EVENTS_FILE = "events.jsonl"
+
+# one background thread per logs folder does all the file work; callers only put records on its queue,
+# so a log call costs the console print and a queue put and never waits on the disk.
+# every record goes to the JSONL audit stream, and the human readable line to its session text file
+class _LogWriter(threading.Thread):
+    def __init__(self, logsDir: str):
+        super().__init__(name="log-writer", daemon=True)
+        self.logsDir = logsDir
+        self.queue = queue.SimpleQueue()
+        self.sessions: Dict[str, object] = {} # open session text files by path
+        self.events = None
+        self.eventsStarted = 0.0
+        self.dirty = False
+        self.lastSync = time.monotonic()
+
+    def submit(self, item) -> None:
+        self.queue.put(item)
+
+    def run(self) -> None:
+        running = True
+        while running:
+            try:
+                item = self.queue.get(timeout=FSYNC_INTERVAL)
+            except queue.Empty:
+                item = None
+            batch = [] if item is None else [item]
+            while len(batch) < 512:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = [entry for entry in batch if entry[0] == "line"]
+            if lines:
+                self.writeLines(lines)
+            for entry in batch:
+                if entry[0] == "line":
+                    continue
+                kind, path, done = entry
+                self.sync()
+                if kind == "close" and path in self.sessions:
+                    self.sessions.pop(path).close()
+                elif kind == "stop":
+                    running = False
+                done.set()
+            if self.dirty and time.monotonic() - self.lastSync >= FSYNC_INTERVAL:
+                self.sync()
+        self.closeAll()
+
+    def writeLines(self, lines) -> None:
+        self.rotateIfDue()
+        events = []
+        for _, path, text, record in lines:
+            events.append(json.dumps(record, default=str) + "\n")
+            if path is not None:
+                f = self.sessions.get(path)
+                if f is None:
+                    f = self.sessions[path] = open(path, "a", encoding="utf-8")
+                f.write(text + "\n")
+        self.eventsFile().write("".join(events))
+        self.eventsFile().flush()
+        for f in self.sessions.values():
+            f.flush()
+        self.dirty = True
+
+    def eventsFile(self):
+        if self.events is None:
+            path = os.path.join(self.logsDir, EVENTS_FILE)
+            self.eventsStarted = time.time()
+            if os.path.exists(path):
+                # keep the age of a file carried over from an earlier run
+                with open(path, "r", encoding="utf-8") as f:
+                    try:
+                        self.eventsStarted = float(json.loads(f.readline())["ts"])
+                    except (ValueError, KeyError, TypeError):
+                        pass
+            self.events = open(path, "a", encoding="utf-8")
+        return self.events
+
+    def rotateIfDue(self) -> None:
+        f = self.eventsFile()
+        if f.tell() == 0:
+            self.eventsStarted = time.time() # nothing to rotate yet, the file starts with this batch
+            return
+        if f.tell() < LOG_MAX_BYTES and time.time() - self.eventsStarted < LOG_ROTATE_SECONDS:
+            return
+        self.sync()
+        f.close()
+        self.events = None
+        path = os.path.join(self.logsDir, EVENTS_FILE)
+        stamp = time.strftime('%Y%m%d_%H%M%S')
+        target = os.path.join(self.logsDir, f"events_{stamp}.jsonl")
+        n = 1
+        while os.path.exists(target): # several rotations within one second
+            target = os.path.join(self.logsDir, f"events_{stamp}_{n:03d}.jsonl")
+            n += 1
+        os.replace(path, target)
+        rotated = sorted(name for name in os.listdir(self.logsDir)
+                         if name.startswith("events_") and name.endswith(".jsonl"))
+        for name in rotated[:-LOG_KEEP] if LOG_KEEP > 0 else rotated:
+            os.remove(os.path.join(self.logsDir, name))
+
+    def sync(self) -> None:
+        for f in list(self.sessions.values()) + ([self.events] if self.events is not None else []):
+            f.flush()
+            os.fsync(f.fileno())
+        self.dirty = False
+        self.lastSync = time.monotonic()
+
+    def closeAll(self) -> None:
+        self.sync()
+        for f in self.sessions.values():
+            f.close()
+        self.sessions.clear()
+        if self.events is not None:
+            self.events.close()
+            self.events = None
 
-    # Create Logs folder in SAME directory as main.py
-    def __init__(self):
-        self.lines = []
+_writers: Dict[str, _LogWriter] = {}
+_writersLock = threading.Lock()
 
+def _writerFor(logsDir: str) -> _LogWriter:
+    with _writersLock:
+        writer = _writers.get(logsDir)
+        if writer is None or not writer.is_alive():
+            writer = _writers[logsDir] = _LogWriter(logsDir)
+            writer.start()
+        return writer
+
+# drain every queue before the interpreter exits, also when main.py stops on an exception
+@atexit.register
+def _stopWriters() -> None:
+    for writer in list(_writers.values()):
+        if writer.is_alive():
+            done = threading.Event()
+            writer.submit(("stop", None, done))
+            done.wait(10)
+
+class Logger:
+
+    # Create Logs folder in SAME directory as main.py (or logsDir)
+    def __init__(self, logsDir: Optional[str] = None):
         baseDir = os.path.dirname(os.path.abspath(__file__))
-        self.logsDir = os.path.join(baseDir, "logs")
+        self.logsDir = logsDir or os.path.join(baseDir, "logs")
         os.makedirs(self.logsDir, exist_ok=True)
 
+        # the session is written as it happens, so a crash mid-sequence still leaves it on disk;
+        # writeToFile gives it the ship name once the cycle is over
+        self.session = f"{time.strftime('%m_%d_%Y_%H%M%S')}_{os.getpid()}_{id(self):x}"
+        self.sessionPath: Optional[str] = os.path.join(self.logsDir, f"session_{self.session}.txt")
+        self.shipName: Optional[str] = None
+        self._writer = _writerFor(self.logsDir)
+
     def timestamp(self) -> str:
         return time.strftime("%m %d %Y: %H:%M")
-    
-    # Logs with the timestamp
-    def log(self, message: str) -> None:
-        line = f"{self.timestamp()} {message}"
-        self.lines.append(line)
-        print(line)
+
+    # Logs with the timestamp; keyword fields only go into the JSONL record (e.g. event="move", step=3)
+    def log(self, message: str, **fields) -> None:
+        self._emit(f"{self.timestamp()} {message}", message, fields)
 
     # Logs without timestamp
-    def logRaw(self, message: str) -> None:
-        self.lines.append(message)
-        print(message)
+    def logRaw(self, message: str, **fields) -> None:
+        self._emit(message, message, fields)
+
+    def _emit(self, line: str, message: str, fields) -> None:
+        print(line)
+        record = {"ts": round(time.time(), 3), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "session": self.session, "message": message}
+        if self.shipName is not None:
+            record["ship"] = self.shipName
+        record.update(fields)
+        self._writer.submit(("line", self.sessionPath, line, record))
+
+    # waits until everything logged so far is written and fsynced
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        done = threading.Event()
+        self._writer.submit(("sync", None, done))
+        return done.wait(timeout)
 
     # Filename example: KeoghsPort10_18_2023_0204.txt
     def writeToFile(self, shipName) -> str:
         filename = f"{shipName}{time.strftime('%m_%d_%Y_%H%M')}.txt"
         full_path = os.path.join(self.logsDir, filename)
 
-        with open(full_path, "w", encoding="utf-8") as f:
-            for line in self.lines:
-                f.write(line + "\n")
+        self.shipName = shipName
+        sessionPath, self.sessionPath = self.sessionPath, None # later lines only go to the JSONL stream
+        if sessionPath is None:
+            return full_path
+        done = threading.Event()
+        self._writer.submit(("close", sessionPath, done))
+        done.wait()
+        if os.path.exists(sessionPath):
+            os.replace(sessionPath, full_path)
+        else:
+            open(full_path, "w", encoding="utf-8").close()
 
         return full_path
-    
+
     def progShutDown(self, shipName) -> None:
         self.log("Program was shut down.")
         logPath = self.writeToFile(shipName)
 
         self.logRaw(f"\nSession log written to: {logPath}")
+        self.flush()
         return None
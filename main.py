@@ -1,14 +1,29 @@
 import os
+import sqlite3
 import sys
-from manifestParser import ManifestParser
+from manifestParser import load_manifest
 from container_ship import ContainerShip
-from astar import a_star_search
-from shipVisuals import loadManifest, containersVisualization
+from anytime_search import anytime_search
+from plan_cache import PlanCache, cached_plan
+from pattern_db import pdb_heuristic
+from search_stats import SearchStats
+from shipVisuals import loadManifest, containersVisualization, moveContainer, DiffRenderer
 from manifestExporter import save_manifest_to_desktop
 from log import Logger
 
+# seconds the planner may keep improving the plan before the operator gets the best one found
+PLAN_TIME_LIMIT = 10.0
+
+# plans are remembered per manifest layout so re-planning the same ship is instant
+PLAN_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plan_cache.sqlite")
+
 def main():
 
+    try:
+        planCache = PlanCache(PLAN_CACHE_PATH)
+    except sqlite3.Error:
+        planCache = None
+
     firstIteration = True
     endTheEntireProg = ""
 
@@ -42,25 +57,33 @@ def main():
             continue
 
         shipName = os.path.basename(filePath).replace(".txt", "")
+        logger.shipName = shipName
 
-        parser = ManifestParser()
-        parserFile = parser.parse_manifest(filePath)
+        # parsed once, shared by the ship, the visual grid and the OUTBOUND export
+        manifest = load_manifest(filePath)
+        totalContainers = manifest.container_count
 
-        totalContainers = 0
+        logger.log(f"Manifest {os.path.basename(filePath)} is opened, there are {totalContainers} containers on the ship.")
 
-        for (pos, weight, desc) in parserFile:
-            if desc != "NAN" and desc != "UNUSED" and weight > 0:
-                totalContainers += 1
+        ship = ContainerShip(manifest)
 
-        logger.log(f"Manifest {os.path.basename(filePath)} is opened, there are {totalContainers} containers on the ship.")
+        # every intermediate plan is logged with how far from optimal it can be at most
+        def reportPlan(moves, cost, bound):
+            logger.log(f"Plan found: {len(moves)} container moves/{cost} crane minutes, at most {bound:.2f}x the optimal time.")
+
+        searchStats = SearchStats()
+        moveHistory, totBalMin, totalBalMove, bound = cached_plan(
+            planCache, ship, lambda s: anytime_search(s, time_limit=PLAN_TIME_LIMIT, heuristic=pdb_heuristic,
+                                    on_plan=reportPlan, stats=searchStats))
 
-        ship = ContainerShip(filePath)
-        moveHistory, totBalMin, totalBalMove = a_star_search(ship, max_expansions=50000)
+        # the stats only exist when the planner ran (not on a plan cache hit)
+        if searchStats.planner is not None:
+            searchStats.log_to(logger)
 
         # when no balance solution -> reloop instead of exiting
         if moveHistory is None:
             logger.log(f"Balance solution was not found for {os.path.basename(filePath)}")
-            logger.log("A* search stopped: search space grew too large or the manifest data may contain an error.")
+            logger.log(f"Search stopped: no plan was found within {PLAN_TIME_LIMIT:.0f} seconds or the manifest data may contain an error.")
             logger.progShutDown(shipName)
             endTheEntireProg = input('Press \"Enter\" to continue the program, or type any key to quit: ').strip()
             continue
@@ -89,57 +112,60 @@ def main():
 
             continue
 
-        visualGrid = loadManifest(filePath)
+        # descriptions come from the ship's registry, only now that the plan is chosen
+        visualGrid = loadManifest(ship.registry)
+
+        # on a real terminal the bay is drawn once and each step only repaints the cells that changed
+        renderer = DiffRenderer() if DiffRenderer.supported() else None
+        showBay = renderer.draw if renderer is not None else containersVisualization
         currShip = ship
 
         moveIndex = 0
 
-        for i in range(1, totalBalMove + 1):
-            startPos, endPos, containerWeight, costToMoveCurrBox = (
-                moveHistory[moveIndex].start_pos,
-                moveHistory[moveIndex].end_pos,
-                moveHistory[moveIndex].container_weight,
-                moveHistory[moveIndex].cost
-            )
-
-            startFmt = f"[{startPos[0]:02d}, {startPos[1]:02d}]"
-            endFmt = f"[{endPos[0]:02d}, {endPos[1]:02d}]"
+        # the terminal is handed back even when the operator stops the sequence with Ctrl-C or a step fails
+        try:
+            for i in range(1, totalBalMove + 1):
+                startPos, endPos, containerWeight, costToMoveCurrBox = (
+                    moveHistory[moveIndex].start_pos,
+                    moveHistory[moveIndex].end_pos,
+                    moveHistory[moveIndex].container_weight,
+                    moveHistory[moveIndex].cost
+                )
+
+                startFmt = f"[{startPos[0]:02d}, {startPos[1]:02d}]"
+                endFmt = f"[{endPos[0]:02d}, {endPos[1]:02d}]"
             
-            if i == 1:
-                containersVisualization(visualGrid, target=startPos, craneParkLocation="source")
-                logger.log(f"{i} of {totalBalMove}: Move from PARK to {startFmt}, {parkToFirstCost} minutes")
-            elif i == totalBalMove:
-                containersVisualization(visualGrid, source=endPos, target=None, craneParkLocation="target")
-                logger.log(f"{i} of {totalBalMove}: Move from {endFmt} to PARK, {lastToParkCost} minutes")    
-            else:
-                containersVisualization(visualGrid, source=startPos, target=endPos, craneParkLocation=None)
-                logger.log(f"{i} of {totalBalMove}: {startFmt} was moved to {endFmt}, {costToMoveCurrBox} minutes")
-
-                currShip = currShip.perform_move(startPos, endPos, containerWeight)
-                sr, sc = startPos
-                tr, tc = endPos
-
-                cell = visualGrid[sr - 1][sc - 1]
-
-                if isinstance(cell, dict):
-                    container_dict = cell
+                if i == 1:
+                    showBay(visualGrid, target=startPos, craneParkLocation="source")
+                    logger.log(f"{i} of {totalBalMove}: Move from PARK to {startFmt}, {parkToFirstCost} minutes",
+                               event="move", step=i, steps=totalBalMove, to=startPos, minutes=parkToFirstCost)
+                elif i == totalBalMove:
+                    showBay(visualGrid, source=endPos, target=None, craneParkLocation="target")
+                    logger.log(f"{i} of {totalBalMove}: Move from {endFmt} to PARK, {lastToParkCost} minutes",
+                               event="move", step=i, steps=totalBalMove, **{"from": endPos}, minutes=lastToParkCost)
                 else:
-                    container_dict = {"weight": containerWeight, "info": ""}
+                    showBay(visualGrid, source=startPos, target=endPos, craneParkLocation=None)
+                    logger.log(f"{i} of {totalBalMove}: {startFmt} was moved to {endFmt}, {costToMoveCurrBox} minutes",
+                               event="move", step=i, steps=totalBalMove, **{"from": startPos}, to=endPos,
+                               weight=containerWeight, minutes=costToMoveCurrBox)
 
-                visualGrid[sr - 1][sc - 1] = "UNUSED"
-                visualGrid[tr - 1][tc - 1] = container_dict
+                    currShip = currShip.perform_move(startPos, endPos, containerWeight)
+                    moveContainer(visualGrid, startPos, endPos, containerWeight)
                 
-                if moveIndex < len(moveHistory) - 1:
-                    moveIndex += 1
+                    if moveIndex < len(moveHistory) - 1:
+                        moveIndex += 1
 
 
-            print("If you want to record a note about this move, type it now. Otherwise, press \"Enter\" to continue:")
-            description = input().strip()
-            if description:
-                logger.log(description)
-        
+                print("If you want to record a note about this move, type it now. Otherwise, press \"Enter\" to continue:")
+                description = input().strip()
+                if description:
+                    logger.log(description)
+        finally:
+            if renderer is not None:
+                renderer.close()
+
         try:
-            outputPath = save_manifest_to_desktop(currShip, visualGrid, shipName)
+            outputPath = save_manifest_to_desktop(currShip, moveHistory, shipName)
             logger.log(f"Finished a Cycle. Manifest {os.path.basename(outputPath)} was written to desktop, and a reminder pop-up to operator to send file was displayed.")
         except Exception as e:
             logger.log(f"ERROR: Failed to save manifest to desktop: {e}")
@@ -1,32 +1,30 @@
 import os
-from container_ship import ContainerShip, MAX_ROWS, MAX_COLS
+from typing import List
+from container_ship import ContainerShip, ContainerMove
+from manifestParser import format_entry
 
 #returns full path to the saved manifest file
-def save_manifest_to_desktop(ship: ContainerShip, visual_grid, ship_name: str) -> str:
+def save_manifest_to_desktop(ship: ContainerShip, moves: List[ContainerMove], ship_name: str) -> str:
     # Get desktop path and create filename with OUTBOUND in all caps
     desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
     output_path = os.path.join(desktop_path, f"{ship_name}_OUTBOUND.txt")
-    
-    # Generate manifest lines with updated positions
-    manifest_lines = []
-    for row in range(1, MAX_ROWS + 1):
-        for col in range(1, MAX_COLS + 1):
-            r, c = row - 1, col - 1
-            weight = ship.grid[r][c]
-            
-            # Get description from visual grid
-            cell = visual_grid[r][c]
-            if weight == 0:
-                desc = cell if isinstance(cell, str) else "UNUSED"
-            else:
-                desc = cell.get("info", "") if isinstance(cell, dict) else ""
-            
-            manifest_lines.append(f"[{row:02d},{col:02d}], {{{weight:05d}}}, {desc}")
-    
+    return save_manifest(ship, moves, output_path)
+
+#writes the manifest for the ship's current layout to output_path and returns it.
+#ship is the final state and moves the plan that led there from the manifest; the descriptions are
+#resolved from the ship's container registry by replaying those moves
+def save_manifest(ship: ContainerShip, moves: List[ContainerMove], output_path: str) -> str:
+    entries = ship.registry.entries_after(moves)
+
+    # the replayed layout has to be the ship's, or descriptions would end up on the wrong containers
+    for (row, col), weight, _ in entries:
+        if ship.grid[row - 1][col - 1] != weight:
+            raise ValueError(f"The moves do not lead to this ship's layout at [{row:02d},{col:02d}]")
+
+    manifest_lines = [format_entry(entry) for entry in entries]
+
     # Write to file
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write('\n'.join(manifest_lines))
-    
-    
-    return output_path
 
+    return output_path
@@ -1,3 +1,12 @@
+import re
+from collections import namedtuple
+
+#one slot of the manifest file: ((row, col), weight, description), 1-indexed like the file
+ManifestEntry = namedtuple('ManifestEntry', ['position', 'weight', 'description'])
+
+#a parsed manifest file. entries is a tuple in file order and container_count counts the real containers
+#(not NAN or UNUSED). it is immutable, so the ship, the visualizer and the exporter can all share one
+Manifest = namedtuple('Manifest', ['path', 'entries', 'container_count'])
 
 class ManifestParser:
     #Parses the data so that I can actually use it
@@ -23,28 +32,46 @@ class ManifestParser:
         inside = weight_str.strip()[1:-1]
         return int(inside)
     
+    #kept for callers that want plain ((row, col), weight, description) tuples
     def parse_manifest(self, file_path: str):
-        parsed = []
+        return list(load_manifest(file_path).entries)
 
-        with open(file_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
+#the fixed-width layout every generated manifest uses: [RR,CC], {WWWWW}, desc
+#the description is stripped and may not be empty, the same as _parse_lines reads it ([^\S\n] is any
+#whitespace but the line break)
+_FIXED_LINE = re.compile(r'^[^\S\n]*\[(\d\d),(\d\d)\], \{(\d{5})\}, [^\S\n]*(\S(?:.*\S)?)[^\S\n]*$', re.MULTILINE)
 
-                try: 
-                    pos_part,weight_part,desc_part = self._split_line(line)
-                    row, col = self._parse_position(pos_part)
-                    weight = self._parse_weight(weight_part)
-                    description = desc_part.strip()
+#reads the whole file at once and decodes it in one regex pass over the text. if any line is not in the
+#fixed-width layout, every line goes through ManifestParser's tolerant splitting instead, and lines that
+#still do not parse are reported and skipped like before
+def load_manifest(file_path: str) -> Manifest:
+    with open(file_path, 'r') as f:
+        text = f.read()
+    return parse_manifest_text(text, file_path)
 
-                    parsed.append(((row,col),weight, description))
+def parse_manifest_text(text: str, path: str = None) -> Manifest:
+    matches = _FIXED_LINE.findall(text)
+    if len(matches) == sum(1 for line in text.splitlines() if line.strip()):
+        entries = tuple(ManifestEntry((int(r), int(c)), int(w), desc) for r, c, w, desc in matches)
+    else:
+        entries = tuple(_parse_lines(text))
+    containers = sum(1 for e in entries if e.weight > 0 and e.description not in ("NAN", "UNUSED"))
+    return Manifest(path, entries, containers)
 
-                except Exception as e:
-                    print(f" Could not parse line:\n {line}\nReason: {e}")
-                    continue
+def _parse_lines(text: str):
+    parser = ManifestParser()
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            pos_part, weight_part, desc_part = parser._split_line(line)
+            yield ManifestEntry(parser._parse_position(pos_part), parser._parse_weight(weight_part),
+                                desc_part.strip())
+        except Exception as e:
+            print(f" Could not parse line:\n {line}\nReason: {e}")
 
-        return parsed
-    
-    
-    
+#the line for one slot, exactly as the manifest files write it
+def format_entry(entry) -> str:
+    (row, col), weight, desc = entry
+    return f"[{row:02d},{col:02d}], {{{weight:05d}}}, {desc}"
@@ -0,0 +1,158 @@
+import argparse
+import os
+import random
+import sys
+from collections import namedtuple
+from typing import Dict, List, Tuple
+from container_ship import MAX_ROWS, MAX_COLS
+from manifestParser import format_entry
+
+#seeded synthetic manifests in the same 96 line format the ship files use, for tests and benchmarks.
+#the same (scenario, seed) always produces the same file, so results can be compared between runs.
+
+#one kind of manifest: fill is the share of usable slots holding a container, nan picks the blocked slots,
+#weights picks the weight distribution and buried_heavy puts that many of the heaviest containers at the
+#bottom of the port side columns, under everything else
+Scenario = namedtuple('Scenario', ['name', 'fill', 'nan', 'weights', 'buried_heavy'])
+
+SCENARIOS = [
+    Scenario("sparse_uniform", 0.08, "hull", "uniform", 0),
+    Scenario("light_normal", 0.12, "hull", "normal", 0),
+    Scenario("bimodal", 0.12, "none", "bimodal", 0),
+    Scenario("heavy_tail", 0.15, "stepped", "heavy_tail", 0),
+    Scenario("buried_heavy", 0.12, "hull", "normal", 2),
+    Scenario("random_nan", 0.15, "random", "uniform", 0),
+    Scenario("lopsided", 0.10, "none", "lopsided", 0),
+    #crowded bays, where most moves are blocked and the balance DP has to respect what cannot be reached
+    Scenario("dense_normal", 0.50, "hull", "normal", 0),
+    Scenario("near_full", 0.90, "hull", "lopsided", 0), #port fills up first, the rest spills to starboard
+    Scenario("deep_buried_heavy", 0.45, "hull", "normal", 6),
+]
+
+#blocked (NAN) slots per layout, 0-indexed (row, col)
+def nan_slots(layout: str, rng: random.Random) -> set:
+    if layout == "none":
+        return set()
+    if layout == "hull": #the bottom corners of the hull
+        return {(0, 0), (0, 1), (0, MAX_COLS - 2), (0, MAX_COLS - 1)}
+    if layout == "stepped": #the hull narrows towards the keel line
+        return {(r, c) for r in range(3) for c in range(MAX_COLS) if min(c, MAX_COLS - 1 - c) < 3 - r}
+    if layout == "random": #scattered pillars starting at the deck
+        slots = set()
+        for c in rng.sample(range(MAX_COLS), rng.randint(1, 4)):
+            slots.update((r, c) for r in range(rng.randint(1, 3)))
+        return slots
+    raise ValueError(f"Unknown NAN layout: {layout}")
+
+#one container weight, always a valid 5 digit manifest weight
+def draw_weight(distribution: str, rng: random.Random) -> int:
+    if distribution == "uniform":
+        w = rng.randint(500, 30000)
+    elif distribution == "normal":
+        w = int(rng.gauss(9000, 2500))
+    elif distribution == "bimodal": #empties and full boxes
+        w = int(rng.gauss(2300, 300)) if rng.random() < 0.4 else int(rng.gauss(24000, 3000))
+    elif distribution == "heavy_tail":
+        w = int(rng.paretovariate(1.5) * 2000)
+    elif distribution == "lopsided": #uniform, see generate_manifest for the placement
+        w = rng.randint(1000, 20000)
+    else:
+        raise ValueError(f"Unknown weight distribution: {distribution}")
+    return min(99999, max(1, w))
+
+#returns manifest entries ((row, col), weight, description), 1-indexed and row-major like the parser
+def generate_manifest(scenario: Scenario, seed: int) -> List[Tuple[Tuple[int, int], int, str]]:
+    rng = random.Random(f"{scenario.name}:{seed}")
+    blocked = nan_slots(scenario.nan, rng)
+    floors = [max((r + 1 for r, c in blocked if c == col), default=0) for col in range(MAX_COLS)]
+    usable = sum(MAX_ROWS - f for f in floors)
+    count = max(1, round(usable * scenario.fill))
+
+    weights = sorted((draw_weight(scenario.weights, rng) for _ in range(count)), reverse=True)
+    columns: Dict[int, List[int]] = {c: [] for c in range(MAX_COLS)}
+
+    #the heaviest ones go in first, so they end up at the bottom of the port side
+    buried = weights[:scenario.buried_heavy]
+    rest = weights[scenario.buried_heavy:]
+    rng.shuffle(rest)
+    port_cols = [c for c in range(MAX_COLS // 2) if floors[c] < MAX_ROWS]
+    for i, w in enumerate(buried):
+        columns[port_cols[i % len(port_cols)]].append(w)
+
+    #stack the rest column by column (bottom up, so everything is supported)
+    if scenario.weights == "lopsided":
+        candidates = list(range(MAX_COLS // 2))
+    else:
+        candidates = list(range(MAX_COLS))
+    for w in rest:
+        open_cols = [c for c in candidates if floors[c] + len(columns[c]) < MAX_ROWS]
+        if not open_cols:
+            open_cols = [c for c in range(MAX_COLS) if floors[c] + len(columns[c]) < MAX_ROWS]
+        columns[rng.choice(open_cols)].append(w)
+
+    entries = []
+    serial = 0
+    for r in range(MAX_ROWS):
+        for c in range(MAX_COLS):
+            if (r, c) in blocked:
+                entries.append(((r + 1, c + 1), 0, "NAN"))
+            elif floors[c] <= r < floors[c] + len(columns[c]):
+                serial += 1
+                entries.append(((r + 1, c + 1), columns[c][r - floors[c]], f"{scenario.name.upper()} {serial:03d}"))
+            else:
+                entries.append(((r + 1, c + 1), 0, "UNUSED"))
+    return entries
+
+def find_scenario(name: str) -> Scenario:
+    for scenario in SCENARIOS:
+        if scenario.name == name:
+            return scenario
+    raise ValueError(f"Unknown scenario: {name}")
+
+#manifest file contents (without the final newline), for parse_manifest_text or a planning request
+def entries_text(entries) -> str:
+    return "\n".join(format_entry(e) for e in entries)
+
+#the contents of the (scenario, seed) manifest; scenario may also be given by name
+def manifest_text(scenario, seed: int) -> str:
+    if isinstance(scenario, str):
+        scenario = find_scenario(scenario)
+    return entries_text(generate_manifest(scenario, seed))
+
+#manifest file contents from {(row, col): weight} (1-indexed), every other slot UNUSED
+def layout_text(weights: Dict[Tuple[int, int], int]) -> str:
+    return entries_text(((r, c), weights.get((r, c), 0), "Box" if weights.get((r, c)) else "UNUSED")
+                        for r in range(1, MAX_ROWS + 1) for c in range(1, MAX_COLS + 1))
+
+def write_manifest(path: str, entries) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(entries_text(entries) + "\n")
+    return path
+
+#writes every scenario for seeds seed..seed+count-1 and returns the paths
+def generate_suite(out_dir: str, seed: int = 0, count: int = 1, scenarios=None) -> List[str]:
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for scenario in scenarios or SCENARIOS:
+        for s in range(seed, seed + count):
+            path = os.path.join(out_dir, f"{scenario.name}_{s}.txt")
+            paths.append(write_manifest(path, generate_manifest(scenario, s)))
+    return paths
+
+#usage: python manifest_generator.py manifests/generated --seed 0 --count 5
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Write seeded synthetic ship manifests.")
+    parser.add_argument("out", help="directory for the generated manifests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--count", type=int, default=1, help="manifests per scenario")
+    parser.add_argument("--scenario", action="append", choices=[s.name for s in SCENARIOS],
+                        help="only these scenarios (repeatable)")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or s.name in args.scenario]
+    for path in generate_suite(args.out, args.seed, args.count, scenarios):
+        print(path)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+from collections import namedtuple
+from typing import List, Sequence
+
+#same bay height as container_ship.MAX_ROWS (not imported: container_ship imports this module)
+MAX_ROWS = 8
+
+#every single-container move of a state at once, indexed [start column][end column] (0-indexed):
+#    crane  minutes to lift the top of the start column onto the end column, -1 if there is no such move
+#    slide  minutes of a legal horizontal slide (the distance), -1 if the container cannot slide there
+MoveTables = namedtuple('MoveTables', ['crane', 'slide'])
+
+#heights and floors as kept by ContainerShip (NAN slots count, a column has a movable top when height > floor).
+#one sweep outwards from every start column carrying the running max height, instead of rescanning
+#the columns in between for every pair like calculate_move_cost does.
+#there used to be a numpy version of this. a state only has 12 columns, so turning the heights into arrays and
+#the tables back into lists cost more than the vectorised arithmetic saved, and the search needs Python lists
+#anyway. only batches of states would have made it pay, and nothing plans that way, so it was dropped
+def move_tables(heights: Sequence[int], floors: Sequence[int]) -> MoveTables:
+    n = len(heights)
+    crane: List[List[int]] = [[-1] * n for _ in range(n)]
+    slide: List[List[int]] = [[-1] * n for _ in range(n)]
+    for c1 in range(n):
+        h1 = heights[c1]
+        if h1 <= floors[c1]:
+            continue
+        crane_row, slide_row = crane[c1], slide[c1]
+        for step in (-1, 1):
+            top = h1 #highest column from c1 to c2, both included
+            can_slide = True
+            c2 = c1 + step
+            while 0 <= c2 < n:
+                h2 = heights[c2]
+                if h2 > top:
+                    top = h2
+                if can_slide:
+                    if h2 > h1 - 1:
+                        can_slide = False #this column blocks the row the container slides along
+                    elif h2 == h1 - 1:
+                        slide_row[c2] = abs(c2 - c1)
+                if h2 < MAX_ROWS:
+                    #up to clear the tallest column, across, and down onto the next empty slot
+                    crane_row[c2] = (top + 1 - h1) + abs(c2 - c1) + (top - h2)
+                c2 += step
+    return MoveTables(crane, slide)
@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional
+from container_ship import ContainerShip, ContainerMove, MAX_COLS, move_span
+
+#rules, in the order they are checked; a pruned move is counted under the first rule that drops it
+RULES = ("dominated_crane", "undo", "chain", "commute", "idle")
+
+#successor pruning for the search loops, every rule with its own switch and counter.
+#the rules that look at the previous move only get it while it is the last move of every cheapest known
+#path to the state (the last_moves bookkeeping in astar.py), so they never hide a path that is still needed.
+#    dominated_crane  a crane move to the slot a slide also reaches: the slide costs the distance, the crane
+#                     at least two more minutes, and both end in the same ship
+#    undo             moving the container that was just moved straight back: that is the state before,
+#                     reached again at a higher cost
+#    chain            moving the container that was just moved again: lifting it from its first column
+#                     straight to the second target costs no more (the crane path over the same columns
+#                     is at most as high and as long) and is one move shorter, so an optimal plan with the
+#                     fewest moves never has two moves of the same container in a row
+#    commute          the move's columns lie entirely left of the previous move's: the two commute and
+#                     the left-to-right order is explored from the parent
+#    idle             moving a container that sits on its column's floor to another column on the same
+#                     side, which changes neither the balance nor what is exposed. it can still be needed
+#                     to clear a crane path or a slide row, so it is NOT optimality safe and is off by default
+#with the defaults the searches still return optimal plans.
+class PruningRules:
+    __slots__ = ('dominated_crane', 'undo', 'chain', 'commute', 'idle', 'counts')
+
+    def __init__(self, dominated_crane: bool = True, undo: bool = True, chain: bool = True,
+                 commute: bool = True, idle: bool = False):
+        self.dominated_crane = dominated_crane
+        self.undo = undo
+        self.chain = chain
+        self.commute = commute
+        self.idle = idle
+        self.counts: Dict[str, int] = {rule: 0 for rule in RULES}
+
+    #True when some rule needs the previous move, i.e. the search has to track it per state
+    @property
+    def uses_last_move(self) -> bool:
+        return self.undo or self.chain or self.commute
+
+    #the moves of `moves` (generated for ship) that survive every enabled rule, in their original order
+    def apply(self, ship: ContainerShip, moves: List[ContainerMove],
+              last_move: Optional[ContainerMove] = None) -> List[ContainerMove]:
+        counts = self.counts
+        slides = None
+        if self.dominated_crane:
+            #a slide costs exactly its distance, a crane move always more
+            slides = {(m.start_pos, m.end_pos) for m in moves
+                      if m.cost == abs(m.start_pos[1] - m.end_pos[1])}
+        last_lo = move_span(last_move)[0] if (self.commute and last_move is not None) else 0
+        just_moved = last_move.end_pos if last_move is not None else None
+        half = MAX_COLS // 2
+
+        kept = []
+        for move in moves:
+            start, end = move.start_pos, move.end_pos
+            if slides and move.cost != abs(start[1] - end[1]) and (start, end) in slides:
+                counts["dominated_crane"] += 1
+                continue
+            if start == just_moved:
+                if end == last_move.start_pos:
+                    if self.undo:
+                        counts["undo"] += 1
+                        continue
+                elif self.chain:
+                    counts["chain"] += 1
+                    continue
+            if move_span(move)[1] < last_lo:
+                counts["commute"] += 1
+                continue
+            if (self.idle and (start[1] <= half) == (end[1] <= half)
+                    and start[0] - 1 == ship.floors[start[1] - 1]):
+                counts["idle"] += 1
+                continue
+            kept.append(move)
+        return kept
+
+    def reset_counts(self):
+        for rule in RULES:
+            self.counts[rule] = 0
@@ -0,0 +1,227 @@
+import heapq
+import multiprocessing as mp
+import os
+import queue
+from typing import Dict, List
+from container_ship import ContainerShip, pack_move, unpack_move
+from heuristic import partition_heuristic
+from astar import a_star_search
+
+#hash distributed A* (HDA*): every state is owned by the worker picked by its zobrist hash, each worker keeps
+#its own open/closed sets, and successors owned by another worker are sent to it in batches.
+#workers prune anything with f >= the shared incumbent, so the search is over once every worker is idle
+#and no batch is in flight: nothing cheaper than the incumbent can be left anywhere, i.e. it is optimal.
+#messages carry (layout, g, parent layout, packed move) instead of whole paths; each worker keeps the parent
+#link of the states it owns, and the plan is traced back through the owners once the search has stopped.
+#Returns (move_history_list, total_g_cost, num_moves) or (None, 0, 0) if not found, like a_star_search;
+#when max_expansions runs out the incumbent plan is returned (it is not proven optimal then).
+def parallel_a_star_search(intial_ship: ContainerShip, workers: int = 0, max_expansions: int = 100000,
+                           heuristic=partition_heuristic, batch_size: int = 64):
+    workers = workers or os.cpu_count() or 1
+    #single process fallback, same search and same answer as the sequential planner
+    if workers <= 1:
+        return a_star_search(intial_ship, max_expansions=max_expansions, heuristic=heuristic,
+                             prune_commuting=False)
+
+    if intial_ship.is_goal():
+        return [], 0, 0
+
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else mp.get_context("spawn")
+    shared = {
+        "lock": ctx.Lock(),
+        "incumbent": ctx.Value('d', float('inf'), lock=False), #cost of the best plan found so far
+        "sent": ctx.Value('q', 0, lock=False), #batches put on a queue
+        "received": ctx.Value('q', 0, lock=False), #batches taken off a queue
+        "idle": ctx.Array('b', [0] * workers, lock=False),
+        "expansions": ctx.Value('q', 0, lock=False),
+        "done": ctx.Event(), #search over, workers only answer trace requests
+        "stop": ctx.Event(),
+    }
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    results = ctx.Queue()
+    links = ctx.Queue() #answers to trace requests
+
+    procs = [ctx.Process(target=_hda_worker, daemon=True,
+                         args=(i, workers, intial_ship, heuristic, inboxes, results, links, shared, batch_size))
+             for i in range(workers)]
+    for p in procs:
+        p.start()
+
+    #seed the owner of the start state
+    owner = intial_ship.zobrist % workers
+    with shared["lock"]:
+        shared["sent"].value += 1
+    inboxes[owner].put([(intial_ship.packed_key, 0, None, None)])
+
+    best_cost, best_goal = float('inf'), None
+    path = None
+    try:
+        while True:
+            try:
+                while True:
+                    g, packed = results.get(timeout=0.005)
+                    if g < best_cost:
+                        best_cost, best_goal = g, packed
+            except queue.Empty:
+                pass
+
+            with shared["lock"]:
+                #out of budget: stop with the incumbent
+                if shared["expansions"].value > max_expansions:
+                    break
+                #termination check: nobody has work and every sent batch has been received
+                if all(shared["idle"]) and shared["sent"].value == shared["received"].value:
+                    break
+            if not any(p.is_alive() for p in procs):
+                break
+        shared["done"].set()
+
+        #pick up plans posted right before termination
+        try:
+            while True:
+                g, packed = results.get(timeout=0.05)
+                if g < best_cost:
+                    best_cost, best_goal = g, packed
+        except queue.Empty:
+            pass
+
+        if best_goal is not None:
+            path = _trace(intial_ship, best_goal, workers, inboxes, links)
+    finally:
+        shared["done"].set()
+        shared["stop"].set()
+        for p in procs:
+            p.join(timeout=1.0)
+            if p.is_alive():
+                p.terminate()
+
+    if path is None:
+        return None, 0, 0
+    moves = [unpack_move(pm) for pm in path]
+    num_moves = len(moves)
+    if num_moves > 0:
+        num_moves += 2
+    #a parent link may have been improved after the goal was posted, so the traced plan can only be cheaper
+    return moves, sum(m.cost for m in moves), num_moves
+
+#follows the parent links back from a goal layout, asking the owner of each state in turn.
+#returns the packed moves from the start state, or None if a worker does not answer
+def _trace(template: ContainerShip, packed: int, workers: int, inboxes, links):
+    path = []
+    while True:
+        inboxes[template.from_packed(packed).zobrist % workers].put(packed)
+        try:
+            link = links.get(timeout=5.0)
+        except queue.Empty:
+            return None
+        if link is None: #the start state
+            path.reverse()
+            return path
+        packed, pm = link
+        path.append(pm)
+
+def _hda_worker(index: int, workers: int, template: ContainerShip, heuristic, inboxes, results, links, shared,
+                batch_size: int):
+    lock = shared["lock"]
+    incumbent = shared["incumbent"]
+    inbox = inboxes[index]
+
+    open_heap = []
+    counter = 0
+    best_g: Dict[int, float] = {} #packed layout -> cheapest g seen by this worker
+    parents: Dict[int, tuple] = {} #packed layout -> (parent layout, packed move) of that g, None for the start
+    outboxes: List[list] = [[] for _ in range(workers)]
+    local_expansions = 0
+
+    def consider(packed: int, g: float, parent, pm, ship: ContainerShip = None):
+        nonlocal counter
+        old = best_g.get(packed)
+        if old is not None and g >= old:
+            return
+        best_g[packed] = g
+        parents[packed] = None if parent is None else (parent, pm)
+        if ship is None:
+            ship = template.from_packed(packed)
+        f = g + heuristic(ship)
+        if f >= incumbent.value:
+            return
+        heapq.heappush(open_heap, (f, counter, g, packed, ship))
+        counter += 1
+
+    def flush(owner: int):
+        batch = outboxes[owner]
+        if not batch:
+            return
+        outboxes[owner] = []
+        with lock:
+            shared["sent"].value += 1
+        inboxes[owner].put(batch)
+
+    def take(batch):
+        with lock:
+            shared["received"].value += 1
+            shared["idle"][index] = 0
+        for packed, g, parent, pm in batch:
+            consider(packed, g, parent, pm)
+
+    while not shared["stop"].is_set():
+        if shared["done"].is_set():
+            #answer trace requests, dropping batches that were still in flight
+            try:
+                item = inbox.get(timeout=0.01)
+            except queue.Empty:
+                continue
+            if not isinstance(item, list):
+                links.put(parents.get(item))
+            continue
+
+        try:
+            while True:
+                take(inbox.get_nowait())
+        except queue.Empty:
+            pass
+
+        if not open_heap or open_heap[0][0] >= incumbent.value:
+            #out of useful work: hand over everything still buffered, then wait for more
+            for owner in range(workers):
+                flush(owner)
+            with lock:
+                shared["idle"][index] = 1
+                shared["expansions"].value += local_expansions
+            local_expansions = 0
+            try:
+                take(inbox.get(timeout=0.01))
+            except queue.Empty:
+                pass
+            continue
+
+        f, _, g, packed, ship = heapq.heappop(open_heap)
+        if g > best_g[packed]:
+            continue
+
+        if ship.is_goal():
+            with lock:
+                if g < incumbent.value:
+                    incumbent.value = g
+                    results.put((g, packed))
+            continue
+
+        local_expansions += 1
+        if local_expansions >= 256:
+            with lock:
+                shared["expansions"].value += local_expansions
+            local_expansions = 0
+
+        for move in ship.get_candidate_moves():
+            new_g = g + move.cost
+            ship.make_move(move)
+            owner = ship.zobrist % workers
+            if owner == index:
+                old = best_g.get(ship.packed_key)
+                if old is None or new_g < old:
+                    consider(ship.packed_key, new_g, packed, pack_move(move), ship.copy())
+            else:
+                outboxes[owner].append((ship.packed_key, new_g, packed, pack_move(move)))
+                if len(outboxes[owner]) >= batch_size:
+                    flush(owner)
+            ship.unmake_move(move)
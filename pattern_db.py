@@ -0,0 +1,245 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+from typing import List, Optional, Sequence
+from container_ship import ContainerShip, MAX_ROWS, MAX_COLS
+from balance_solver import nearest_sums
+from heuristic import partition_heuristic
+
+#pattern database over column height profiles.
+#the abstraction keeps only the heights of the six columns on the side that has to give weight away
+#(columns numbered from the hull, so column 5 is next to the keel) plus k, how many containers still have
+#to leave that side. every real move maps onto one abstract move that costs no more:
+#    removal   a container leaves the side: k - 1, costs at least its way over the rest of the side to the keel
+#    shuffle   a container moves within the side: exact crane/slide minutes, all columns involved are known
+#    arrival   a container comes over from the other side: k unchanged, costs at least its way in from the keel
+#so the abstract distance to k = 0 is an admissible estimate of the crane minutes left. a real plan has to
+#carry over at least as many containers as the fewest heaviest ones covering the missing weight, which is
+#the k looked up at search time.
+#without identities a container could come over and go straight back for a cheap "removal", so the builder
+#also tracks one marker: the column whose top container is known to have come over. taking that one off
+#again does not count towards k, and the marker is forgotten once something covers it. only the unmarked
+#entries are ever looked up, so only those are written to disk.
+SIDE_COLS = MAX_COLS // 2
+BASE = MAX_ROWS + 1
+PLACES = [BASE ** i for i in range(SIDE_COLS)]
+NUM_PROFILES = BASE ** SIDE_COLS
+
+#layers stored on disk; a k beyond the last layer reads the last one, which is still a lower bound
+DEFAULT_LAYERS = 4
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "column_profiles.pdb")
+
+#file layout: magic, layers, rows, columns per side, then one uint8 per (layer, profile)
+MAGIC = b"CSPDB\x01"
+HEADER = struct.Struct("<6sHHH")
+UNREACHED = 255
+
+def profile_index(heights: Sequence[int]) -> int:
+    return sum(h * p for h, p in zip(heights, PLACES))
+
+def decode_profile(index: int) -> List[int]:
+    heights = []
+    for _ in range(SIDE_COLS):
+        index, h = divmod(index, BASE)
+        heights.append(h)
+    return heights
+
+#cheapest way for the top container of column c to leave the side
+def removal_cost(h: List[int], c: int) -> int:
+    to_keel = SIDE_COLS - c
+    blocking = max(h[c + 1:], default=0)
+    if blocking < h[c]:
+        return to_keel #a slide may be possible, and a crane move costs at least one more
+    return blocking + 1 - h[c] + to_keel
+
+#cheapest way for a container from the other side to land on column d
+def arrival_cost(h: List[int], d: int) -> int:
+    from_keel = SIDE_COLS - d
+    blocking = max(h[d + 1:], default=0)
+    if blocking <= h[d]:
+        return from_keel
+    return 1 + from_keel + blocking - h[d]
+
+#exact minutes to move the top of column c onto column d, the same rules as ContainerShip
+def shuffle_cost(h: List[int], c: int, d: int) -> int:
+    lo, hi = (c, d) if c < d else (d, c)
+    top = max(h[lo:hi + 1])
+    crane = (top + 1 - h[c]) + (hi - lo) + (top - h[d])
+    if h[d] == h[c] - 1 and max(h[lo + 1:hi], default=0) <= h[d]:
+        return min(crane, hi - lo)
+    return crane
+
+#builds layers 1..layers with one backwards Dijkstra per layer (bucket queue, costs are small integers).
+#internally a state is marker * NUM_PROFILES + profile, marker 0 meaning no known foreign container
+#and marker c + 1 meaning the top of column c came over from the other side
+def build_table(layers: int = DEFAULT_LAYERS, progress=None) -> bytearray:
+    markers = SIDE_COLS + 1
+    table = bytearray()
+    previous = bytes(markers * NUM_PROFILES) #layer 0: nothing left to move
+    for k in range(1, layers + 1):
+        dist = bytearray([UNREACHED]) * (markers * NUM_PROFILES)
+        buckets: List[List[int]] = [[] for _ in range(UNREACHED)]
+
+        def relax(state: int, v: int):
+            if v < dist[state]:
+                dist[state] = v
+                buckets[v].append(state)
+
+        #seed every state with its best counted removal into the previous layer
+        for index in range(NUM_PROFILES):
+            h = decode_profile(index)
+            costs = [removal_cost(h, c) if h[c] > 0 else UNREACHED for c in range(SIDE_COLS)]
+            for marker in range(markers):
+                base = marker * NUM_PROFILES
+                best = UNREACHED
+                for c in range(SIDE_COLS):
+                    if costs[c] < UNREACHED and marker != c + 1:
+                        best = min(best, costs[c] + previous[base + index - PLACES[c]])
+                if best < UNREACHED:
+                    relax(base + index, best)
+
+        #relax the moves that keep k backwards: pred -> state through one abstract move
+        for value in range(UNREACHED):
+            for state in buckets[value]:
+                if dist[state] != value:
+                    continue
+                marker, index = divmod(state, NUM_PROFILES)
+                h = decode_profile(index)
+
+                if marker == 0:
+                    #the marked container left again
+                    for c in range(SIDE_COLS):
+                        if h[c] < MAX_ROWS:
+                            h[c] += 1
+                            relax((c + 1) * NUM_PROFILES + index + PLACES[c], value + removal_cost(h, c))
+                            h[c] -= 1
+
+                for d in range(SIDE_COLS):
+                    if h[d] == 0:
+                        continue
+                    h[d] -= 1
+                    if marker == d + 1:
+                        #arrival onto d, from any marker
+                        v = value + arrival_cost(h, d)
+                        for m in range(markers):
+                            relax(m * NUM_PROFILES + index - PLACES[d], v)
+                    for c in range(SIDE_COLS):
+                        if c == d or h[c] >= MAX_ROWS or marker == c + 1:
+                            continue
+                        h[c] += 1
+                        v = value + shuffle_cost(h, c, d)
+                        pred = index - PLACES[d] + PLACES[c]
+                        if marker == d + 1:
+                            relax((c + 1) * NUM_PROFILES + pred, v) #the marked container was moved
+                        elif marker == 0:
+                            relax(pred, v)
+                            relax((d + 1) * NUM_PROFILES + pred, v) #the marked container got covered
+                        else:
+                            relax(marker * NUM_PROFILES + pred, v)
+                        h[c] -= 1
+                    h[d] += 1
+            buckets[value] = []
+
+        table += dist[:NUM_PROFILES]
+        previous = dist
+        if progress is not None:
+            progress(k, layers)
+    return table
+
+def write_table(path: str, table: bytearray, layers: int):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, layers, MAX_ROWS, SIDE_COLS))
+        f.write(table)
+    os.replace(tmp, path)
+
+#read-only view of a built table, memory mapped so every process planning at once shares one copy
+class PatternDatabase:
+    def __init__(self, path: str = DEFAULT_PATH):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, layers, rows, cols = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or rows != MAX_ROWS or cols != SIDE_COLS:
+            self._mm.close()
+            raise ValueError(f"{path} is not a pattern database for a {MAX_ROWS}x{MAX_COLS} bay")
+        if len(self._mm) != HEADER.size + layers * NUM_PROFILES:
+            self._mm.close()
+            raise ValueError(f"{path} is truncated")
+        self.layers = layers
+
+    #lower bound on the minutes to carry k containers off a side with this height profile (hull first)
+    def lookup(self, heights: Sequence[int], k: int) -> float:
+        if k <= 0:
+            return 0.0
+        value = self._mm[HEADER.size + (min(k, self.layers) - 1) * NUM_PROFILES + profile_index(heights)]
+        return float('inf') if value == UNREACHED else float(value)
+
+    #same split into "port must lose weight" and "port must gain weight" as partition_heuristic
+    def lower_bound(self, ship: ContainerShip) -> float:
+        if ship.is_goal():
+            return 0.0
+        below, above = nearest_sums(ship.balance.goal_sums, ship.port_weight)
+        best = float('inf')
+        if below is not None:
+            k = crossings_needed(ship, True, ship.port_weight - below)
+            best = min(best, self.lookup(ship.heights[:SIDE_COLS], k))
+        if above is not None:
+            k = crossings_needed(ship, False, above - ship.port_weight)
+            best = min(best, self.lookup(ship.heights[:SIDE_COLS - 1:-1], k))
+        return 0.0 if best == float('inf') else best
+
+    def close(self):
+        self._mm.close()
+
+#fewest containers on one side whose weights add up to `need` (heaviest first), a lower bound on crossings
+def crossings_needed(ship: ContainerShip, from_port: bool, need: int) -> int:
+    if need <= 0:
+        return 0
+    cols = range(0, SIDE_COLS) if from_port else range(SIDE_COLS, MAX_COLS)
+    weights = sorted((ship.grid[r][c] for c in cols for r in range(ship.floors[c], ship.heights[c])), reverse=True)
+    for count, w in enumerate(weights, 1):
+        need -= w
+        if need <= 0:
+            return count
+    return MAX_ROWS * MAX_COLS #the weight is not there: no plan in this direction
+
+_default_db = None
+_default_loaded = False
+
+#the table at DEFAULT_PATH, or None when it has not been built (pdb_heuristic then falls back)
+def default_database() -> Optional[PatternDatabase]:
+    global _default_db, _default_loaded
+    if not _default_loaded:
+        _default_loaded = True
+        try:
+            _default_db = PatternDatabase(DEFAULT_PATH)
+        except (OSError, ValueError):
+            _default_db = None
+    return _default_db
+
+#partition_heuristic tightened with the pattern database; both are admissible so their max is too
+def pdb_heuristic(ship: ContainerShip) -> float:
+    h = partition_heuristic(ship)
+    db = default_database()
+    if db is None:
+        return h
+    return max(h, db.lower_bound(ship))
+
+#usage: python pattern_db.py [--layers 4] [--out column_profiles.pdb]
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build the column height pattern database.")
+    parser.add_argument("--layers", type=int, default=DEFAULT_LAYERS, help="largest k stored (1-254)")
+    parser.add_argument("--out", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+    if not 1 <= args.layers < UNREACHED:
+        parser.error("--layers must be between 1 and 254")
+
+    table = build_table(args.layers, progress=lambda k, n: print(f"layer {k}/{n} done", flush=True))
+    write_table(args.out, table, args.layers)
+    print(f"wrote {args.out} ({HEADER.size + len(table)} bytes)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from typing import List, Optional
+from container_ship import ContainerShip, ContainerMove, pack_move, unpack_move
+from plan_verifier import PlanVerifier, verified_cost
+
+#bump whenever move generation, move costs or the goal test change: every stored plan is dropped on open
+PLANNER_VERSION = "3"
+
+#a plan served from (or stored into) the cache
+CachedPlan = namedtuple('CachedPlan', ['moves', 'cost', 'num_moves', 'bound'])
+
+#on-disk plan store keyed by ContainerShip.fingerprint().
+#hits are replayed with verified_cost before being returned, so a stale or corrupted row can never reach
+#the operator, and the table is kept under max_entries by evicting the least recently used plans.
+#a plan that ends outside the ship's own goal (the best reachable balance of a search that ran out of
+#states, see astar.closest_plan) is stored with that imbalance, and replayed against it.
+class PlanCache:
+    def __init__(self, path: str, max_entries: int = 10000):
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30.0)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'planner_version'").fetchone()
+        if row is None or row[0] != PLANNER_VERSION:
+            #the layout may have changed as well, so the table is rebuilt
+            self.conn.execute("DROP TABLE IF EXISTS plans")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('planner_version', ?)",
+                              (PLANNER_VERSION,))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS plans (fingerprint TEXT PRIMARY KEY, moves TEXT NOT NULL, "
+                          "cost INTEGER NOT NULL, bound REAL NOT NULL, imbalance INTEGER, last_used REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS plans_last_used ON plans (last_used)")
+        self.conn.commit()
+
+    #returns the stored plan for this ship, or None on a miss or when the stored plan no longer replays
+    def get(self, ship: ContainerShip) -> Optional[CachedPlan]:
+        fingerprint = ship.fingerprint()
+        row = self.conn.execute("SELECT moves, cost, bound, imbalance FROM plans WHERE fingerprint = ?",
+                                (fingerprint,)).fetchone()
+        if row is None:
+            return None
+
+        moves = [unpack_move(pm) for pm in json.loads(row[0])]
+        if verified_cost(ship, moves, row[3]) != row[1]:
+            self.conn.execute("DELETE FROM plans WHERE fingerprint = ?", (fingerprint,))
+            self.conn.commit()
+            return None
+
+        self.conn.execute("UPDATE plans SET last_used = ? WHERE fingerprint = ?", (time.time(), fingerprint))
+        self.conn.commit()
+        return CachedPlan(moves, row[1], len(moves) + 2 if moves else 0, row[2])
+
+    #stores a plan unless an equally cheap one with an equal or tighter bound is already there.
+    #a plan that does not even replay legally is never stored
+    def put(self, ship: ContainerShip, moves: List[ContainerMove], cost: float, bound: float = 1.0):
+        check = PlanVerifier(ship).check(moves)
+        if not check.ok and check.step != 0:
+            return
+        imbalance = None if check.ok else check.imbalance
+        fingerprint = ship.fingerprint()
+        row = self.conn.execute("SELECT cost, bound FROM plans WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        if row is not None and (row[0], row[1]) <= (cost, bound):
+            return
+        self.conn.execute("INSERT OR REPLACE INTO plans (fingerprint, moves, cost, bound, imbalance, last_used) "
+                          "VALUES (?, ?, ?, ?, ?, ?)",
+                          (fingerprint, json.dumps([pack_move(m) for m in moves]), cost, bound, imbalance,
+                           time.time()))
+        self._evict()
+        self.conn.commit()
+
+    #drops the least recently used plans beyond max_entries
+    def _evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute("DELETE FROM plans WHERE fingerprint IN "
+                              "(SELECT fingerprint FROM plans ORDER BY last_used ASC LIMIT ?)",
+                              (count - self.max_entries,))
+
+    def close(self):
+        self.conn.close()
+
+#cache-first planning: planner(ship) must return (moves, cost, num_moves, bound) like anytime_search.
+#only plans that are not proven optimal (bound > 1) are re-planned, and the better answer is kept
+def cached_plan(cache: Optional[PlanCache], ship: ContainerShip, planner) -> CachedPlan:
+    if cache is not None:
+        hit = cache.get(ship)
+        if hit is not None and hit.bound <= 1.0:
+            return hit
+
+    moves, cost, num_moves, bound = planner(ship)
+    if cache is not None and moves is not None:
+        cache.put(ship, moves, cost, bound)
+        hit = cache.get(ship)
+        if hit is not None:
+            return hit
+    return CachedPlan(moves, cost, num_moves, bound)
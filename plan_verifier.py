@@ -0,0 +1,146 @@
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import namedtuple
+from typing import List, Optional, Sequence
+from container_ship import ContainerShip, ContainerMove, MAX_ROWS, MAX_COLS
+
+#outcome of replaying one plan. crane_minutes is what the moves cost, park_minutes the two PARK legs.
+#when ok is False, error says what went wrong and step is the 1-based move it went wrong at
+#(0 when the plan as a whole is the problem, e.g. it does not end balanced). imbalance is the final |P-S|
+#of a plan that replayed legally to its end, None otherwise
+PlanCheck = namedtuple('PlanCheck', ['ok', 'crane_minutes', 'park_minutes', 'error', 'step', 'imbalance'],
+                       defaults=(None,))
+
+#independent replay of move lists against the rules of ContainerShip, without building a ship per step:
+#the state is one flat list of cell weights plus the column heights, patched in place per move.
+#every move is checked for an exposed container of the stated weight at its start, an empty supported slot at
+#its end and a cost that matches the crane path (or the slide) over the current heights, and the plan has to
+#end in a goal state. build one per manifest and call check() for every plan of it.
+#min_imbalance is a best reachable imbalance proven by a search that ran out of states (astar.closest_plan),
+#accepted as a goal besides the ship's own DP minimum
+class PlanVerifier:
+    def __init__(self, ship: ContainerShip, min_imbalance: Optional[int] = None):
+        self.ship = ship
+        self.min_imbalance = min_imbalance
+        self.cells = [w for row in ship.grid for w in row] #row-major, 0-indexed r * MAX_COLS + c
+        self.heights = list(ship.heights)
+        self.floors = ship.floors
+        self.port_weight = ship.port_weight
+        self.total_weight = ship.port_weight + ship.starboard_weight
+
+    def check(self, moves: Sequence[ContainerMove]) -> PlanCheck:
+        cells = self.cells[:]
+        heights = self.heights[:]
+        floors = self.floors
+        port = self.port_weight
+        half = MAX_COLS // 2
+        crane_minutes = 0
+
+        for step, move in enumerate(moves, 1):
+            try:
+                (r1, c1), (r2, c2) = move.start_pos, move.end_pos
+                weight, cost = move.container_weight, move.cost
+            except (TypeError, ValueError, AttributeError):
+                return PlanCheck(False, crane_minutes, 0, "malformed move", step)
+            if not (1 <= c1 <= MAX_COLS and 1 <= c2 <= MAX_COLS and 1 <= r1 <= MAX_ROWS and 1 <= r2 <= MAX_ROWS):
+                return PlanCheck(False, crane_minutes, 0, "position outside the bay", step)
+            c1 -= 1
+            c2 -= 1
+            h1, h2 = heights[c1], heights[c2]
+            if c1 == c2:
+                return PlanCheck(False, crane_minutes, 0, "start and end in the same column", step)
+            if r1 != h1 or h1 <= floors[c1]:
+                return PlanCheck(False, crane_minutes, 0, f"no exposed container at {move.start_pos}", step)
+            if cells[(r1 - 1) * MAX_COLS + c1] != weight:
+                return PlanCheck(False, crane_minutes, 0, f"container at {move.start_pos} does not weigh {weight}", step)
+            if r2 != h2 + 1:
+                return PlanCheck(False, crane_minutes, 0, f"{move.end_pos} is not the next free slot of its column", step)
+
+            lo, hi = (c1, c2) if c1 < c2 else (c2, c1)
+            distance = hi - lo
+            if cost == distance:
+                #a slide: same row, and nothing in between reaches the row the container slides along
+                if r2 != r1 or max(heights[lo + 1:hi], default=0) > r1 - 1:
+                    return PlanCheck(False, crane_minutes, 0, f"illegal slide {move.start_pos} -> {move.end_pos}", step)
+            else:
+                top = max(heights[lo:hi + 1])
+                expected = (top + 1 - h1) + distance + (top - h2)
+                if cost != expected:
+                    return PlanCheck(False, crane_minutes, 0, f"move costs {expected} minutes, plan says {cost}", step)
+
+            cells[(r1 - 1) * MAX_COLS + c1] = 0
+            cells[(r2 - 1) * MAX_COLS + c2] = weight
+            heights[c1] = h1 - 1
+            heights[c2] = h2 + 1
+            if c1 < half <= c2:
+                port -= weight
+            elif c2 < half <= c1:
+                port += weight
+            crane_minutes += cost
+
+        park_minutes = 0
+        if moves:
+            park_minutes = (self.ship.calculate_park_to_position_cost(moves[0].start_pos)
+                            + self.ship.calculate_position_to_park_cost(moves[-1].end_pos))
+
+        #the goal test of ContainerShip.is_goal on the final weights
+        ship = self.ship
+        diff = abs(port - (self.total_weight - port))
+        if not (ship.original_total_weight == 0 or diff < 0.10 * ship.original_total_weight
+                or diff == ship.min_possible_imbalance or diff == self.min_imbalance):
+            return PlanCheck(False, crane_minutes, park_minutes, f"plan ends unbalanced (|P-S| = {diff})", 0, diff)
+        return PlanCheck(True, crane_minutes, park_minutes, None, None, diff)
+
+def verify_plan(ship: ContainerShip, moves: Sequence[ContainerMove], min_imbalance: Optional[int] = None) -> PlanCheck:
+    return PlanVerifier(ship, min_imbalance).check(moves)
+
+#crane minutes of a legal plan that ends balanced, None otherwise
+def verified_cost(ship: ContainerShip, moves: Sequence[ContainerMove],
+                  min_imbalance: Optional[int] = None) -> Optional[float]:
+    result = PlanVerifier(ship, min_imbalance).check(moves)
+    return result.crane_minutes if result.ok else None
+
+#checks a <ship>_plan.json written by batch_plan (or any JSON with "manifest" and "moves" in that format)
+def check_plan_file(path: str) -> PlanCheck:
+    with open(path, "r", encoding="utf-8") as f:
+        summary = json.load(f)
+    if summary.get("status") not in (None, "ok"):
+        return PlanCheck(False, 0, 0, f"no plan in the file ({summary.get('status')})", 0)
+    ship = ContainerShip(summary["manifest"])
+    moves = [ContainerMove(tuple(m["from"]), tuple(m["to"]), m["weight"], m["minutes"]) for m in summary["moves"]]
+    result = PlanVerifier(ship).check(moves)
+    if result.ok and "crane_minutes" in summary and summary["crane_minutes"] != result.crane_minutes:
+        return result._replace(ok=False, error=f"file says {summary['crane_minutes']} crane minutes", step=0)
+    if result.ok and "park_minutes" in summary and summary["park_minutes"] != result.park_minutes:
+        return result._replace(ok=False, error=f"file says {summary['park_minutes']} PARK minutes", step=0)
+    return result
+
+#usage: python plan_verifier.py plans/            (every *_plan.json in the directory)
+#       python plan_verifier.py plans/ShipCase1_plan.json ...
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay and check plan files written by batch_plan.")
+    parser.add_argument("paths", nargs="+", help="plan JSON files or directories of them")
+    args = parser.parse_args(argv)
+
+    files: List[str] = []
+    for path in args.paths:
+        files += sorted(glob.glob(os.path.join(path, "*_plan.json"))) if os.path.isdir(path) else [path]
+    failures = 0
+    for path in files:
+        try:
+            result = check_plan_file(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            result = PlanCheck(False, 0, 0, str(e), 0)
+        if result.ok:
+            print(f"ok      {path}  {result.crane_minutes} + {result.park_minutes} minutes")
+        else:
+            failures += 1
+            where = f" (move {result.step})" if result.step else ""
+            print(f"FAILED  {path}{where}: {result.error}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
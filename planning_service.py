@@ -0,0 +1,419 @@
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from typing import Dict, Optional
+from container_ship import ContainerShip
+from astar import a_star_search
+from manifestParser import load_manifest, parse_manifest_text
+from pattern_db import default_database, pdb_heuristic
+from plan_cache import PlanCache, cached_plan
+from search_stats import SearchStats
+
+#local planning daemon, so several yard terminals share one warm planner. clients talk JSON lines over a
+#Unix socket (or 127.0.0.1 TCP where there are none); every request and every event is one JSON object.
+#    {"op": "plan", "manifest": path | "manifest_text": text, "id": optional, "max_expansions": n,
+#     "mode": "astar"|"pea"|"ida", "weight": w, "deadline": seconds after submission}
+#    {"op": "cancel", "job": id}
+#    {"op": "status"}
+#a plan request is answered with a stream of events for its job id: queued, started, progress (every
+#progress_interval seconds), then exactly one of done, failed, cancelled or timeout. a request the bounded
+#queue has no room for gets rejected straight away. every job runs a_star_search in its own process, forked
+#from the daemon (the pattern database is already mapped and the modules imported), so cancelling or timing
+#out a job just terminates that process.
+#
+#usage: python planning_service.py serve --socket /tmp/crane_planner.sock --workers 2
+#       python planning_service.py plan ShipCase1.txt --socket /tmp/crane_planner.sock
+DEFAULT_SOCKET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crane_planner.sock")
+DEFAULT_PORT = 8765
+
+#events after which a job gets no more messages
+FINAL_EVENTS = ("done", "failed", "cancelled", "timeout", "rejected")
+
+#the search statistics double as the progress feed: the loops call note_open_size once per pop
+class _ProgressStats(SearchStats):
+    __slots__ = ('_conn', '_interval', '_next_report', '_pops')
+
+    def __init__(self, conn, interval: float):
+        super().__init__()
+        self._conn = conn
+        self._interval = interval
+        self._next_report = time.perf_counter() + interval
+        self._pops = 0
+
+    def note_open_size(self, size: int):
+        super().note_open_size(size)
+        self._pops += 1
+        if self._pops & 255 == 0:
+            now = time.perf_counter()
+            if now >= self._next_report:
+                self._next_report = now + self._interval
+                self._conn.send({"event": "progress", "popped": self._pops, "generated": self.generated,
+                                 "open": size, "seconds": round(now - self._started, 3)})
+
+#body of a job process: plans one manifest and sends progress and the result back over conn
+def _plan_job(conn, request: dict, cache_path: Optional[str], progress_interval: float):
+    try:
+        if "manifest_text" in request:
+            manifest = parse_manifest_text(request["manifest_text"], request.get("manifest"))
+        else:
+            manifest = load_manifest(request["manifest"])
+        ship = ContainerShip(manifest)
+        stats = _ProgressStats(conn, progress_interval)
+        weight = float(request.get("weight", 1.0))
+
+        def planner(s):
+            return a_star_search(s, max_expansions=int(request.get("max_expansions", 100000)),
+                                 heuristic=pdb_heuristic, mode=request.get("mode", "astar"), weight=weight,
+                                 stats=stats) + (max(1.0, weight),)
+
+        cache = PlanCache(cache_path) if cache_path else None
+        try:
+            moves, crane_minutes, num_moves, bound = cached_plan(cache, ship, planner)
+        finally:
+            if cache is not None:
+                cache.close()
+
+        if moves is None:
+            conn.send({"event": "failed", "error": "no plan found within the expansion budget",
+                       "expansions": stats.expansions})
+            return
+        park_minutes = 0
+        if moves:
+            park_minutes = (ship.calculate_park_to_position_cost(moves[0].start_pos)
+                            + ship.calculate_position_to_park_cost(moves[-1].end_pos))
+        conn.send({
+            "event": "done",
+            "moves": [{"from": list(m.start_pos), "to": list(m.end_pos), "weight": m.container_weight,
+                       "minutes": m.cost} for m in moves],
+            "num_moves": num_moves,
+            "crane_minutes": crane_minutes,
+            "park_minutes": park_minutes,
+            "total_minutes": crane_minutes + park_minutes,
+            "bound": bound,
+            "cache_hit": stats.planner is None,
+            "expansions": stats.expansions,
+        })
+    except Exception as e:
+        conn.send({"event": "failed", "error": str(e)})
+    finally:
+        conn.close()
+
+class _Job:
+    __slots__ = ('id', 'request', 'send', 'process', 'cancelled', 'submitted')
+
+    def __init__(self, job_id: str, request: dict, send):
+        self.id = job_id
+        self.request = request
+        self.send = send #coroutine function posting an event to the client that submitted the job
+        self.process = None
+        self.cancelled = False
+        self.submitted = time.monotonic()
+
+#the daemon: a bounded queue of jobs drained by `workers` slots, each running one job process at a time
+class PlanningService:
+    def __init__(self, workers: int = 2, queue_size: int = 16, cache_path: Optional[str] = None,
+                 progress_interval: float = 0.5):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.cache_path = cache_path
+        self.progress_interval = progress_interval
+        self.jobs: Dict[str, _Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots = []
+        self._server = None
+        self._ids = itertools.count(1)
+        self._ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else mp.get_context("spawn")
+
+    async def start(self, socket_path: Optional[str] = None, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        default_database() #map the pattern database once, every forked job shares it
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._slots = [asyncio.ensure_future(self._slot()) for _ in range(self.workers)]
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path) #left behind by a daemon that did not shut down cleanly
+            self._server = await asyncio.start_unix_server(self._handle_client, path=socket_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_client, host, port)
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        for job in list(self.jobs.values()):
+            self.cancel(job.id)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for slot in self._slots:
+            slot.cancel()
+        await asyncio.gather(*self._slots, return_exceptions=True)
+
+    #cancels a queued or running job; False when there is no such job (or it already finished)
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        job.cancelled = True
+        if job.process is not None and job.process.is_alive():
+            job.process.terminate()
+        return True
+
+    def status(self) -> dict:
+        running = [job.id for job in self.jobs.values() if job.process is not None]
+        return {"event": "status", "workers": self.workers, "running": running,
+                "queued": self._queue.qsize(), "queue_size": self.queue_size}
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        lock = asyncio.Lock()
+        mine = []
+
+        async def send(message: dict):
+            if writer.is_closing():
+                return
+            async with lock:
+                try:
+                    writer.write((json.dumps(message) + "\n").encode("utf-8"))
+                    await writer.drain()
+                except ConnectionError:
+                    pass
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    op = request["op"]
+                except (ValueError, KeyError, TypeError):
+                    await send({"event": "error", "error": "expected a JSON object with an op"})
+                    continue
+                if op == "plan":
+                    job = await self._submit(request, send)
+                    if job is not None:
+                        mine.append(job.id)
+                elif op == "cancel":
+                    found = self.cancel(str(request.get("job")))
+                    if not found:
+                        await send({"event": "error", "job": request.get("job"), "error": "no such job"})
+                elif op == "status":
+                    await send(self.status())
+                else:
+                    await send({"event": "error", "error": f"unknown op: {op}"})
+        finally:
+            #nobody is left to read the results of this client's jobs
+            for job_id in mine:
+                self.cancel(job_id)
+            writer.close()
+
+    async def _submit(self, request: dict, send) -> Optional[_Job]:
+        job_id = str(request.get("id") or f"job-{next(self._ids)}")
+        error = None
+        if job_id in self.jobs:
+            error = "job id already in use"
+        elif "manifest" not in request and "manifest_text" not in request:
+            error = "no manifest given"
+        elif self._queue.full():
+            error = "planner queue is full"
+        if error is not None:
+            await send({"event": "rejected", "job": job_id, "error": error})
+            return None
+        job = _Job(job_id, request, send)
+        self.jobs[job_id] = job
+        self._queue.put_nowait(job)
+        #written before the first await, so it always reaches the client ahead of "started"
+        await send({"event": "queued", "job": job_id, "position": self._queue.qsize()})
+        return job
+
+    async def _slot(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self.jobs.pop(job.id, None)
+                self._queue.task_done()
+
+    #runs one job process and relays its events until it finishes, is cancelled or passes its deadline
+    async def _run(self, job: _Job):
+        if job.cancelled:
+            await job.send({"event": "cancelled", "job": job.id})
+            return
+        deadline = job.request.get("deadline")
+        expires = job.submitted + float(deadline) if deadline is not None else None
+
+        parent, child = self._ctx.Pipe(duplex=False)
+        job.process = self._ctx.Process(target=_plan_job, daemon=True,
+                                        args=(child, job.request, self.cache_path, self.progress_interval))
+        job.process.start()
+        child.close()
+        await job.send({"event": "started", "job": job.id})
+
+        loop = asyncio.get_running_loop()
+        final = None
+        try:
+            while final is None:
+                if job.cancelled:
+                    final = {"event": "cancelled"}
+                    break
+                if expires is not None and time.monotonic() >= expires:
+                    final = {"event": "timeout", "error": f"deadline of {float(deadline):g}s passed"}
+                    break
+                #the pipe is polled from a thread so the event loop never blocks on a busy job
+                if not await loop.run_in_executor(None, parent.poll, 0.1):
+                    if not job.process.is_alive() and not parent.poll():
+                        final = {"event": "failed", "error": f"planner exited with code {job.process.exitcode}"}
+                    continue
+                try:
+                    message = parent.recv()
+                except EOFError:
+                    continue
+                if message["event"] in FINAL_EVENTS:
+                    final = message
+                else:
+                    await job.send(dict(message, job=job.id))
+        finally:
+            if job.process.is_alive():
+                job.process.terminate()
+            await loop.run_in_executor(None, job.process.join)
+            parent.close()
+        final["job"] = job.id
+        final["seconds"] = round(time.monotonic() - job.submitted, 3)
+        await job.send(final)
+
+#asyncio client for the daemon; also what tests and other tools drive it with.
+#one connection can carry several jobs at once, their events are sorted by job id as they arrive
+class PlanningClient:
+    def __init__(self):
+        self._reader = None
+        self._writer = None
+        self._events: Dict[str, asyncio.Queue] = {}
+        self._replies: asyncio.Queue = asyncio.Queue()
+        self._listener = None
+        self._ids = itertools.count(1)
+
+    async def connect(self, socket_path: Optional[str] = None, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        if socket_path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(socket_path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._listener = asyncio.ensure_future(self._listen())
+        return self
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+
+    async def _listen(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                for events in self._events.values():
+                    events.put_nowait({"event": "failed", "error": "connection to the planner closed"})
+                return
+            message = json.loads(line)
+            job_id = message.get("job")
+            if job_id in self._events:
+                self._events[job_id].put_nowait(message)
+            else:
+                self._replies.put_nowait(message)
+
+    async def _send(self, request: dict):
+        self._writer.write((json.dumps(request) + "\n").encode("utf-8"))
+        await self._writer.drain()
+
+    #submits a plan and returns its final event (done carries the moves); on_event sees every event
+    async def plan(self, manifest_path: Optional[str] = None, manifest_text: Optional[str] = None,
+                   on_event=None, **options) -> dict:
+        job_id = f"{os.getpid()}-{next(self._ids)}"
+        events = self._events[job_id] = asyncio.Queue()
+        request = dict(options, op="plan", id=job_id)
+        if manifest_text is not None:
+            request["manifest_text"] = manifest_text
+        if manifest_path is not None:
+            request["manifest"] = os.path.abspath(manifest_path) if manifest_text is None else manifest_path
+        try:
+            await self._send(request)
+            while True:
+                message = await events.get()
+                if on_event is not None:
+                    on_event(message)
+                if message["event"] in FINAL_EVENTS:
+                    return message
+        finally:
+            del self._events[job_id]
+
+    async def cancel(self, job_id: str):
+        await self._send({"op": "cancel", "job": job_id})
+
+    async def status(self) -> dict:
+        await self._send({"op": "status"})
+        while True:
+            message = await self._replies.get()
+            if message.get("event") == "status":
+                return message
+
+def _address(args) -> dict:
+    if args.port is not None or not hasattr(asyncio, "start_unix_server"):
+        return {"host": args.host, "port": args.port or DEFAULT_PORT}
+    return {"socket_path": args.socket}
+
+async def _serve(args):
+    address = _address(args)
+    service = PlanningService(args.workers, args.queue_size, args.cache)
+    await service.start(**address)
+    print("planner listening on " + (address.get("socket_path") or f"{address['host']}:{address['port']}"), flush=True)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+async def _plan(args) -> int:
+    client = await PlanningClient().connect(**_address(args))
+    try:
+        options = {"max_expansions": args.max_expansions, "mode": args.mode}
+        if args.deadline is not None:
+            options["deadline"] = args.deadline
+        result = await client.plan(args.manifest, on_event=lambda m: print(json.dumps(m), flush=True), **options)
+    finally:
+        await client.close()
+    return 0 if result["event"] == "done" else 1
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Local planning daemon shared by several terminals.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path")
+    parser.add_argument("--port", type=int, default=None, help="listen on / connect to 127.0.0.1 TCP instead")
+    parser.add_argument("--host", default="127.0.0.1")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run the daemon")
+    serve.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    serve.add_argument("--queue-size", type=int, default=16, help="jobs waiting beyond this are rejected")
+    serve.add_argument("--cache", default=None, help="sqlite plan cache shared by all jobs")
+
+    plan = commands.add_parser("plan", help="plan one manifest through a running daemon")
+    plan.add_argument("manifest")
+    plan.add_argument("--max-expansions", type=int, default=100000)
+    plan.add_argument("--mode", choices=("astar", "pea", "ida"), default="astar")
+    plan.add_argument("--deadline", type=float, default=None, help="seconds before the job is abandoned")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "serve":
+            asyncio.run(_serve(args))
+            return 0
+        return asyncio.run(_plan(args))
+    except KeyboardInterrupt:
+        return 130
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import multiprocessing as mp
+import queue
+import time
+from collections import namedtuple
+from typing import List, Optional
+from container_ship import ContainerShip, pack_move, unpack_move
+from heuristic import partition_heuristic
+from astar import a_star_search, beam_search
+from anytime_search import anytime_search
+from plan_verifier import verified_cost
+
+#one entry of the portfolio: kind picks the planner, params are passed straight to it
+Strategy = namedtuple('Strategy', ['name', 'kind', 'params'])
+
+#exact A* is the only one that always proves optimality, the others are there to get a good plan early
+DEFAULT_STRATEGIES = [
+    Strategy("exact", "astar", {"max_expansions": 2000000}),
+    Strategy("weighted", "astar", {"max_expansions": 2000000, "weight": 2.0}),
+    Strategy("beam", "beam", {"width": 300}),
+    Strategy("greedy_improve", "anytime", {"initial_weight": 10.0, "weight_step": 1.5}),
+]
+
+#result of portfolio_search: the best verified plan and which strategy produced it
+PortfolioResult = namedtuple('PortfolioResult', ['moves', 'cost', 'num_moves', 'optimal', 'strategy'])
+
+#races every strategy in its own process and keeps the cheapest plan that replays legally to a goal.
+#on_plan(moves, cost, strategy, optimal) streams every improvement. the losers are terminated as soon as
+#a plan is proven optimal (exact A* finished, ARA* reached bound 1, or the cost meets the admissible
+#heuristic of the start state) or when time_limit runs out.
+def portfolio_search(intial_ship: ContainerShip, time_limit: float = 30.0,
+                     strategies: Optional[List[Strategy]] = None, on_plan=None) -> PortfolioResult:
+    strategies = strategies or DEFAULT_STRATEGIES
+    if intial_ship.is_goal():
+        return PortfolioResult([], 0, 0, True, None)
+
+    lower_bound = partition_heuristic(intial_ship)
+    deadline = time.monotonic() + time_limit
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else mp.get_context("spawn")
+    results = ctx.Queue()
+    procs = {s.name: ctx.Process(target=_run_strategy, args=(s, intial_ship, time_limit, results), daemon=True)
+             for s in strategies}
+    for p in procs.values():
+        p.start()
+
+    best = PortfolioResult(None, 0, 0, False, None)
+    running = set(procs)
+    try:
+        while running and time.monotonic() < deadline:
+            try:
+                name, packed, cost, optimal = results.get(timeout=min(0.05, max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                continue
+            if packed is None: #strategy finished (with or without a plan)
+                running.discard(name)
+                continue
+
+            moves = [unpack_move(pm) for pm in packed]
+            if verified_cost(intial_ship, moves) != cost:
+                continue #never hand out a plan that does not replay exactly
+            optimal = optimal or cost <= lower_bound
+            if best.moves is None or cost < best.cost or (cost == best.cost and optimal and not best.optimal):
+                best = PortfolioResult(moves, cost, len(moves) + 2 if moves else 0, optimal, name)
+                if on_plan is not None:
+                    on_plan(moves, cost, name, optimal)
+            if best.optimal:
+                break
+    finally:
+        for p in procs.values():
+            if p.is_alive():
+                p.terminate()
+            p.join(timeout=1.0)
+    return best
+
+#process body: runs one strategy and posts (name, packed moves, cost, proven optimal) messages,
+#finishing with (name, None, 0, False)
+def _run_strategy(strategy: Strategy, ship: ContainerShip, time_limit: float, results):
+    def post(moves, cost, optimal):
+        results.put((strategy.name, tuple(pack_move(m) for m in moves), cost, optimal))
+
+    try:
+        params = dict(strategy.params)
+        if strategy.kind == "astar":
+            moves, cost, _ = a_star_search(ship, **params)
+            if moves is not None:
+                post(moves, cost, params.get("weight", 1.0) <= 1.0 and params.get("mode", "astar") in ("astar", "ida"))
+        elif strategy.kind == "beam":
+            moves, cost, _ = beam_search(ship, **params)
+            if moves is not None:
+                post(moves, cost, False)
+        elif strategy.kind == "anytime":
+            params.setdefault("time_limit", time_limit)
+            anytime_search(ship, on_plan=lambda moves, cost, bound: post(moves, cost, bound <= 1.0), **params)
+        else:
+            raise ValueError(f"Unknown strategy kind: {strategy.kind}")
+    finally:
+        results.put((strategy.name, None, 0, False))
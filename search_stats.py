@@ -0,0 +1,116 @@
+import sys
+import time
+from typing import Dict, List
+from container_ship import ContainerShip
+
+#phases timed separately; everything else in the search loop (heap pushes/pops, bookkeeping) is "other"
+PHASES = ("move_generation", "heuristic", "goal_checks", "hashing", "copying")
+
+#opt-in counters for one search run. pass an instance as stats= to a_star_search or anytime_search and read
+#it afterwards; with stats=None the planners skip all of this. the goal test is O(1) (the minimum imbalance
+#is solved once per manifest), so goal_checks counts calls, there is no per-check search behind it any more.
+class SearchStats:
+    __slots__ = ('planner', 'expansions', 'generated', 'duplicates', 'reopens', 'stale_pops', 'goal_checks',
+                 'heuristic_calls', 'open_high_water', 'visited_entries', 'phase_seconds', 'wall_seconds',
+                 'memory_bytes', 'pruned', 'found', '_started')
+
+    def __init__(self):
+        self.planner = None
+        self.expansions = 0 #states whose successors were generated
+        self.generated = 0 #successors produced by move generation
+        self.duplicates = 0 #successors dropped because the state was already reached at least as cheaply
+        self.reopens = 0 #already reached states queued again with a cheaper g
+        self.stale_pops = 0 #queue entries skipped because a cheaper path had superseded them
+        self.goal_checks = 0
+        self.heuristic_calls = 0
+        self.open_high_water = 0
+        self.visited_entries = 0
+        self.phase_seconds: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+        self.wall_seconds = 0.0
+        self.memory_bytes: Dict[str, int] = {}
+        self.pruned: Dict[str, int] = {} #successors dropped per pruning rule (see move_pruning)
+        self.found = False
+        self._started = 0.0
+
+    def start(self, planner: str):
+        self.planner = planner
+        self._started = time.perf_counter()
+
+    def stop(self, found: bool):
+        self.found = found
+        self.wall_seconds = time.perf_counter() - self._started
+
+    #wraps fn so every call is timed under phase (and counted in the counter attribute, if one is named)
+    def timed(self, phase: str, fn, counter: str = None):
+        clock = time.perf_counter
+        seconds = self.phase_seconds
+
+        def run(*args):
+            if counter is not None:
+                setattr(self, counter, getattr(self, counter) + 1)
+            started = clock()
+            try:
+                return fn(*args)
+            finally:
+                seconds[phase] += clock() - started
+        return run
+
+    #what the search's PruningRules dropped since their counts were `before`
+    def note_pruned(self, rules, before: Dict[str, int]):
+        self.pruned = {rule: count - before.get(rule, 0) for rule, count in rules.counts.items()}
+
+    def note_open_size(self, size: int):
+        if size > self.open_high_water:
+            self.open_high_water = size
+
+    #rough footprint of the search structures: one dict entry per visited state, every ship kept alive
+    #(by default the open list at its high-water mark) and any extra per-node storage such as the arena
+    def estimate_memory(self, sample_ship, visited_dicts=(), extra_bytes: int = 0, stored_ships: int = None):
+        key = sample_ship.state_key()
+        entry = sys.getsizeof(key) + sys.getsizeof(key.packed) + sys.getsizeof(key.zobrist)
+        visited = sum(sys.getsizeof(d) for d in visited_dicts) + self.visited_entries * entry
+        ship = (sys.getsizeof(sample_ship) + sys.getsizeof(sample_ship.grid) + sys.getsizeof(sample_ship.heights)
+                + sum(sys.getsizeof(row) for row in sample_ship.grid))
+        if stored_ships is None:
+            stored_ships = self.open_high_water
+        ships = stored_ships * (ship + 120) #plus the heap tuple, node tuple and the float/int fields
+        self.memory_bytes = {"visited": visited, "ships": ships, "other": extra_bytes,
+                             "total": visited + ships + extra_bytes}
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__ if not name.startswith('_')}
+
+    #human readable summary, one line per group, for the session log
+    def report_lines(self) -> List[str]:
+        rate = self.expansions / self.wall_seconds if self.wall_seconds > 0 else 0.0
+        timed = sum(self.phase_seconds.values())
+        phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phase_seconds.items())
+        lines = [
+            f"Search stats ({self.planner}): {'plan found' if self.found else 'no plan'} in {self.wall_seconds:.3f}s, "
+            f"{self.expansions} expansions ({rate:.0f}/s), {self.generated} generated.",
+            f"Search stats: {self.duplicates} duplicates, {self.reopens} re-opened, {self.stale_pops} stale pops, "
+            f"{self.goal_checks} goal checks, {self.heuristic_calls} heuristic calls.",
+            f"Search stats: {phases}, other {max(0.0, self.wall_seconds - timed):.3f}s.",
+            f"Search stats: open list peak {self.open_high_water}, {self.visited_entries} visited states.",
+        ]
+        if self.pruned:
+            lines.append("Search stats: pruned " + ", ".join(
+                f"{rule} {count}" for rule, count in self.pruned.items()) + ".")
+        if self.memory_bytes:
+            lines.append("Search stats: estimated memory " + ", ".join(
+                f"{part} {size / (1 << 20):.1f} MiB" for part, size in self.memory_bytes.items()) + ".")
+        return lines
+
+    def log_to(self, logger):
+        for line in self.report_lines():
+            logger.log(line)
+
+#the ship operations a search loop calls per node: (moves, is_goal, state_key, copy, heuristic).
+#plain unbound methods without stats, timed and counted wrappers with it
+def search_ops(stats, heuristic):
+    ops = (ContainerShip.get_candidate_moves, ContainerShip.is_goal, ContainerShip.state_key, ContainerShip.copy)
+    if stats is None:
+        return ops + (heuristic,)
+    return (stats.timed("move_generation", ops[0]), stats.timed("goal_checks", ops[1], "goal_checks"),
+            stats.timed("hashing", ops[2]), stats.timed("copying", ops[3]),
+            stats.timed("heuristic", heuristic, "heuristic_calls"))
@@ -1,79 +1,183 @@
+import os
+import shutil
+import sys
+from manifestParser import Manifest, load_manifest
+from container_registry import ContainerRegistry
 
-def loadManifest(shipCase):    
+
+#shipCase is a manifest path, an already loaded Manifest (the same one the ship was built from) or the ship's
+#ContainerRegistry, in which case the descriptions are resolved for the layout after moves
+def loadManifest(shipCase, moves=()):    
     shipGrid = [["NAN" for _ in range(12)] for _ in range(8)]
 
-    with open(shipCase, "r") as manifest:
-        for containerInfo in manifest:            
-            #need to separate the parts because each line has [01,01], {00000}, NAN structure
-            information = containerInfo.strip().split(',')
-            rowInfo = information[0][1:3]
-            columnInfo = information[1][0:2]
-            tareInfo = int(information[2].strip("{} "))
-            itemInfo = information[3].strip()
-
-            rows = int(rowInfo)
-            columns = int(columnInfo)
-
-            if itemInfo in ["NAN", "UNUSED"]:
-                shipGrid[rows - 1][columns - 1] = itemInfo
-            else:
-                shipGrid[rows - 1][columns - 1] = {
-                    "weight": tareInfo,
-                    "info": itemInfo}      
+    if isinstance(shipCase, ContainerRegistry):
+        entries = shipCase.entries_after(moves)
+    else:
+        entries = (shipCase if isinstance(shipCase, Manifest) else load_manifest(shipCase)).entries
+    for (rows, columns), tareInfo, itemInfo in entries:
+        if not (1 <= rows <= 8 and 1 <= columns <= 12):
+            continue
+        if itemInfo in ["NAN", "UNUSED"]:
+            shipGrid[rows - 1][columns - 1] = itemInfo
+        else:
+            shipGrid[rows - 1][columns - 1] = {
+                "weight": tareInfo,
+                "info": itemInfo}      
                  
     return shipGrid
 
-def containersVisualization(shipGrid, source = None, target = None, craneParkLocation = None):   #can call in the source and the target for each turn using visualization
-    green = "\033[92m"
-    red = "\033[91m"
-    original = "\033[0m"
-    columnWidth = 6
-    rowWidth = 3             #the size of each cell vertically and horizontally
+#moves a container in the visual grid (keeps its description with it), mirrors ContainerShip.perform_move
+def moveContainer(shipGrid, startPos, endPos, containerWeight):
+    sr, sc = startPos
+    tr, tc = endPos
 
-    print("\n")
+    cell = shipGrid[sr - 1][sc - 1]
+    if isinstance(cell, dict):
+        container_dict = cell
+    else:
+        container_dict = {"weight": containerWeight, "info": ""}
+
+    shipGrid[sr - 1][sc - 1] = "UNUSED"
+    shipGrid[tr - 1][tc - 1] = container_dict
 
-    if craneParkLocation == "source":
-        print(" " * 6 + f"{green}XXX{original}")
-    elif craneParkLocation == "target":
-        print(" " * 6 + f"{red}XXX{original}")
+green = "\033[92m"
+red = "\033[91m"
+original = "\033[0m"
+columnWidth = 6
+rowWidth = 3             #the size of each cell vertically and horizontally
+
+#text of one cell (without color), right aligned in its column
+def cellText(container):
+    if container == "UNUSED":    #need to show the empy space to the operator
+        info = "..."
+    elif container == "NAN":  
+        info = "NAN"
     else:
-        print(" " * 6 + "XXX")
+        info = str(container["weight"])
+    return info.rjust(columnWidth)
+
+def parkText(craneParkLocation, color = True):
+    if color and craneParkLocation == "source":
+        return f"{green}XXX{original}"
+    if color and craneParkLocation == "target":
+        return f"{red}XXX{original}"
+    return "XXX"
+
+def paintCell(text, row, column, source, target, color = True):
+    if not color:
+        return text
+    if source == (row, column):
+        return f"{green}{text}{original}"
+    if target == (row, column):
+        return f"{red}{text}{original}"
+    return text
+
+#the bay as lines: the crane park marker, rows 8 down to 1, then the column headers
+def renderFrame(shipGrid, source = None, target = None, craneParkLocation = None, color = True):
+    lines = [" " * 6 + parkText(craneParkLocation, color)]
 
     for row in range(8, 0, -1): #going from the top of the ship downward
         if row in (8, 1):
             rowNumber = f"{row:02d}"
         else:
             rowNumber = "  "
-        rows = f"{rowNumber}".ljust(rowWidth)
-
-        for column in range(1, 13):
-            container = shipGrid[row - 1][column - 1]
-
-            if container == "UNUSED":    #need to show the empy space to the operator
-                info = "..."
-            elif container == "NAN":  
-                info = "NAN"
-            else:
-                info = str(container["weight"])
-
-            info_padded = info.rjust(columnWidth)
-            if source == (row, column):
-                info_padded = f"{green}{info_padded}{original}"
-            elif target == (row, column):
-                info_padded = f"{red}{info_padded}{original}"
-            rows += info_padded
-        print(rows)
+        cells = [paintCell(cellText(shipGrid[row - 1][column - 1]), row, column, source, target, color)
+                 for column in range(1, 13)]
+        lines.append(f"{rowNumber}".ljust(rowWidth) + "".join(cells))
 
     #the column headers
-    columnHeader = ""
-    for column in range(1, 13):
-        if column in (1, 12):
-            columnHeader += f"{column:02d}".rjust(columnWidth)
-        else:
-            columnHeader += "  ".rjust(columnWidth)
-            
-    print(" " * rowWidth + columnHeader)
+    columnHeader = "".join((f"{column:02d}" if column in (1, 12) else "  ").rjust(columnWidth) for column in range(1, 13))
+    lines.append(" " * rowWidth + columnHeader)
+    return lines
+
+def containersVisualization(shipGrid, source = None, target = None, craneParkLocation = None):   #can call in the source and the target for each turn using visualization
     print("\n")
+    print("\n".join(renderFrame(shipGrid, source, target, craneParkLocation)))
+    print("\n")
+
+#draws the bay once at the top of the terminal and afterwards only rewrites the cells that changed, so a
+#step costs a few cursor moves instead of the whole grid. everything else printed (log lines, prompts)
+#scrolls in the region below the bay, which therefore never moves
+class DiffRenderer:
+    BAY_LINES = 10 #park marker, 8 rows, column headers
+
+    def __init__(self, out = None):
+        self.out = out or sys.stdout
+        self.cells = None #last painted text per (row, column), (0, 0) is the park marker
+
+    #ANSI cursor addressing needs a real terminal, anything else keeps the plain full redraw
+    @staticmethod
+    def supported(out = None):
+        out = out or sys.stdout
+        return hasattr(out, "isatty") and out.isatty() and os.environ.get("TERM", "") != "dumb"
+
+    def draw(self, shipGrid, source = None, target = None, craneParkLocation = None):
+        cells = {(0, 0): parkText(craneParkLocation)}
+        for row in range(1, 9):
+            for column in range(1, 13):
+                cells[(row, column)] = paintCell(cellText(shipGrid[row - 1][column - 1]), row, column, source, target)
+
+        if self.cells is None:
+            height = shutil.get_terminal_size().lines
+            #clear, draw at the top, then confine scrolling to the lines under the bay
+            frame = "\n".join(renderFrame(shipGrid, source, target, craneParkLocation))
+            self.out.write(f"\033[2J\033[H{frame}\n\033[{self.BAY_LINES + 2};{max(height, self.BAY_LINES + 3)}r"
+                           f"\033[{self.BAY_LINES + 2};1H")
+        else:
+            updates = [f"\033[{self.screenLine(pos)};{self.screenColumn(pos)}H{text}"
+                       for pos, text in cells.items() if self.cells[pos] != text]
+            if updates:
+                #save the cursor, patch the cells, put it back where the log output continues
+                self.out.write("\0337" + "".join(updates) + "\0338")
+        self.out.flush()
+        self.cells = cells
+
+    def screenLine(self, pos):
+        row, _ = pos
+        return 1 if row == 0 else 2 + (8 - row)
+
+    def screenColumn(self, pos):
+        row, column = pos
+        return 7 if row == 0 else rowWidth + (column - 1) * columnWidth + 1
+
+    #gives the whole screen back to normal scrolling
+    def close(self):
+        if self.cells is not None:
+            self.out.write("\033[r\033[999;1H\n")
+            self.out.flush()
+            self.cells = None
+
+#the (source, target, craneParkLocation) of every step main.py shows for a plan: PARK to the first container,
+#one step per move, the last container back to PARK
+def planSteps(moves):
+    if not moves:
+        return []
+    steps = [(None, moves[0].start_pos, "source")]
+    steps += [(m.start_pos, m.end_pos, None) for m in moves]
+    steps.append((moves[-1].end_pos, None, "target"))
+    return steps
+
+#headless: every step of a plan rendered into one text file, written in one go (no colors unless asked)
+def renderPlan(shipGrid, moves, outputPath, color = False):
+    grid = [row[:] for row in shipGrid]
+    steps = planSteps(moves)
+    parts = []
+    for i, (source, target, park) in enumerate(steps, 1):
+        if park == "source":
+            title = f"{i} of {len(steps)}: Move from PARK to [{target[0]:02d}, {target[1]:02d}]"
+        elif park == "target":
+            title = f"{i} of {len(steps)}: Move from [{source[0]:02d}, {source[1]:02d}] to PARK"
+        else:
+            title = f"{i} of {len(steps)}: [{source[0]:02d}, {source[1]:02d}] was moved to [{target[0]:02d}, {target[1]:02d}]"
+        parts.append(title)
+        parts.extend(renderFrame(grid, source, target, park, color))
+        parts.append("")
+        if park is None:
+            move = moves[i - 2]
+            moveContainer(grid, move.start_pos, move.end_pos, move.container_weight)
+    with open(outputPath, "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+    return outputPath
 
 def main():
     grid = loadManifest("manifests/ShipCase5.txt")
@@ -1,12 +1,12 @@
-from manifestParser import ManifestParser
-
-def format_entry(entry):
-    (row, col), weight, desc = entry
-    return f"[{row:02d},{col:02d}], {{{weight:05d}}}, {desc}"
+import os
+import tempfile
+from manifestParser import ManifestParser, format_entry
+from manifest_generator import find_scenario, generate_manifest, write_manifest
 
 def main():
-    # Path to manifest file
-    manifest_file = "manifests/testManifest.txt"
+    # Path to manifest file (a seeded one from manifest_generator)
+    manifest_file = write_manifest(os.path.join(tempfile.gettempdir(), "testManifest.txt"),
+                                   generate_manifest(find_scenario("lopsided"), 0))
 
     #Parses the file
     parser = ManifestParser()
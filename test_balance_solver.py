@@ -0,0 +1,91 @@
+from collections import deque
+import pytest
+from container_ship import ContainerShip
+from manifestParser import parse_manifest_text
+from manifest_generator import layout_text
+from astar import a_star_search
+from anytime_search import anytime_search
+from plan_verifier import verify_plan
+from plan_cache import PlanCache
+
+#best |P-S| over every state the crane can reach, by brute force
+def best_reachable(ship):
+    seen = {ship.state_key()}
+    queue = deque([ship.copy()])
+    best = ship.get_balance_difference()
+    while queue:
+        state = queue.popleft()
+        best = min(best, state.get_balance_difference())
+        for move in state.get_candidate_moves():
+            state.make_move(move)
+            key = state.state_key()
+            if key not in seen:
+                seen.add(key)
+                queue.append(state.copy())
+            state.unmake_move(move)
+    return best
+
+def test_nearly_full_bay_bound_is_reachable(nearly_full_text):
+    ship = ContainerShip(parse_manifest_text(nearly_full_text))
+    assert ship.min_possible_imbalance == best_reachable(ship) == 3563
+
+@pytest.mark.parametrize("mode", ["astar", "pea"])
+def test_nearly_full_bay_gets_a_best_balance_plan(mode, nearly_full_text):
+    ship = ContainerShip(parse_manifest_text(nearly_full_text))
+    moves, cost, _ = a_star_search(ship, mode=mode)
+    assert moves is not None
+    check = verify_plan(ship, moves)
+    assert check.ok and check.crane_minutes == cost
+
+    final = ship
+    for move in moves:
+        final = final.perform_move(move.start_pos, move.end_pos, move.container_weight)
+    assert final.get_balance_difference() == 3563
+
+#as if the DP had promised an imbalance the crane cannot reach, like on a bay whose stacking order it cannot see
+def promise_unreachable(ship, imbalance):
+    solver = ship.balance
+    solver.min_imbalance = imbalance
+    solver.goal_sums = solver.port_sums & solver._goal_band()
+
+TWO_BOXES = {(1, 1): 50, (1, 2): 20} #the best reachable imbalance is 30
+
+#an unreachable DP minimum must not leave the searches without a plan: once every state is expanded they
+#return the plan to the best reachable balance, and leave the caller's ship as it was
+@pytest.mark.parametrize("planner", ["astar", "pea", "anytime"])
+def test_exhausted_search_falls_back_to_best_reachable(planner):
+    manifest = parse_manifest_text(layout_text(TWO_BOXES))
+    _, optimal_cost, _ = a_star_search(ContainerShip(manifest))
+
+    ship = ContainerShip(manifest)
+    assert ship.min_possible_imbalance == 30
+    promise_unreachable(ship, 10)
+    if planner == "anytime":
+        moves, cost, _, bound = anytime_search(ship, time_limit=30.0)
+        assert bound == 1.0
+    else:
+        moves, cost, _ = a_star_search(ship, mode=planner)
+
+    assert moves is not None and cost == optimal_cost
+    assert ship.min_possible_imbalance == 10
+    check = verify_plan(ship, moves)
+    assert not check.ok and check.imbalance == 30
+    assert verify_plan(ship, moves, min_imbalance=30).ok
+
+#such a plan is cached with its imbalance, so a fresh ship of the manifest gets it back instead of replanning
+def test_fallback_plan_survives_the_cache(tmp_path):
+    manifest = parse_manifest_text(layout_text(TWO_BOXES))
+    ship = ContainerShip(manifest)
+    promise_unreachable(ship, 10)
+    moves, cost, _ = a_star_search(ship)
+
+    cache = PlanCache(str(tmp_path / "plans.sqlite"))
+    try:
+        cache.put(ship, moves, cost)
+        for _ in range(2):
+            fresh = ContainerShip(manifest)
+            promise_unreachable(fresh, 10)
+            hit = cache.get(fresh)
+            assert hit is not None and hit.moves == moves and hit.cost == cost
+    finally:
+        cache.close()
@@ -1,7 +1,10 @@
 import os
+import tempfile
 from container_ship import ContainerShip
 from astar import a_star_search
 from heuristic import balance_heuristic
+from plan_verifier import verify_plan
+from manifest_generator import find_scenario, generate_manifest, write_manifest
 
 #helper function to print list of moves
 def print_moves(moves):
@@ -18,8 +21,9 @@ def main():
     # 1. LOAD MANIFEST
     # ------------------------------------------------------------
 
-    #Place the path to the test manifest file here
-    manifest_path = "manifests/testManifest.txt" 
+    #a seeded manifest from manifest_generator (place the path to another manifest file here to test that one)
+    manifest_path = write_manifest(os.path.join(tempfile.gettempdir(), "testManifest.txt"),
+                                   generate_manifest(find_scenario("lopsided"), 0))
     if not os.path.exists(manifest_path):
         print(f"ERROR: Manifest file not found: {manifest_path}")
         return
@@ -51,7 +55,7 @@ def main():
     # 4. RUN A* SEARCH
     # ------------------------------------------------------------
     print("\n=== RUNNING A* SEARCH ===")
-    move_history, cost = a_star_search(ship, max_expansions=5000)
+    move_history, cost, _ = a_star_search(ship, max_expansions=5000)
 
     if move_history is None:
         print("A* could not find a solution.")
@@ -64,6 +68,13 @@ def main():
     # 5. APPLY MOVES TO VERIFY FINAL STATE
     # ------------------------------------------------------------
     print("\n=== VERIFYING END STATE ===")
+    check = verify_plan(ship, move_history)
+    print("Plan legal and balanced:", check.ok)
+    if not check.ok:
+        print(f"  move {check.step}: {check.error}")
+    print("Replayed crane minutes:", check.crane_minutes, "(A* reported", str(cost) + ")")
+    print("PARK minutes:", check.park_minutes)
+
     final_ship = ship
     for move in move_history:
         final_ship = final_ship.perform_move(move.start_pos,
@@ -0,0 +1,32 @@
+import pytest
+import manifestParser
+from manifestParser import _parse_lines, parse_manifest_text
+from manifest_generator import manifest_text
+
+GENERATED = manifest_text("random_nan", 0)
+
+#fixed-width files the one regex pass has to read exactly like the line by line parser
+FIXED_WIDTH = [
+    GENERATED,
+    GENERATED.replace("\n", "\r\n"),
+    GENERATED.replace("UNUSED", "  UNUSED \t").replace("NAN", "\tNAN  "),
+    "\n  [01,01], {00120},   Big   Box  \n\n[01,02], {00000}, UNUSED\t\r\n",
+]
+
+#files the regex pass must hand over to the line by line parser
+NOT_FIXED_WIDTH = [
+    "[01,01], {00120}, \n[01,02], {00000}, UNUSED\n", #empty description
+    "[1,1], {120}, Box\n[01,02], {00000}, UNUSED\n", #not zero padded
+]
+
+@pytest.mark.parametrize("text", FIXED_WIDTH)
+def test_fast_path_matches_line_parser(text, monkeypatch):
+    expected = tuple(_parse_lines(text))
+    monkeypatch.setattr(manifestParser, "_parse_lines", None) #the fast path must not need it
+    manifest = parse_manifest_text(text)
+    assert manifest.entries == expected
+    assert all(e.description == e.description.strip() and e.description for e in manifest.entries)
+
+@pytest.mark.parametrize("text", NOT_FIXED_WIDTH)
+def test_other_layouts_fall_back(text, capsys):
+    assert parse_manifest_text(text).entries == tuple(_parse_lines(text))
@@ -0,0 +1,39 @@
+import pytest
+from container_ship import ContainerShip
+from astar import a_star_search
+from move_pruning import PruningRules
+from plan_verifier import verify_plan
+
+def no_pruning():
+    return PruningRules(dominated_crane=False, undo=False, chain=False, commute=False, idle=False)
+
+#uniform cost search with every rule off: the reference optimum
+def ucs_cost(manifest):
+    moves, cost, _ = a_star_search(ContainerShip(manifest), max_expansions=10 ** 6,
+                                   heuristic=lambda ship: 0.0, pruning=no_pruning())
+    assert moves is not None
+    return cost
+
+@pytest.fixture(scope="module")
+def reference(small_bays):
+    return {seed: ucs_cost(manifest) for seed, manifest in small_bays.items()}
+
+#the default rules (dominated_crane, undo, chain, commute) must never cost an optimal plan
+@pytest.mark.parametrize("mode", ["astar", "pea", "ida"])
+def test_default_rules_keep_plans_optimal(mode, reference, small_bays):
+    for seed, manifest in small_bays.items():
+        ship = ContainerShip(manifest)
+        rules = PruningRules()
+        moves, cost, _ = a_star_search(ship, max_expansions=10 ** 6, mode=mode, pruning=rules)
+        assert moves is not None, f"seed {seed}"
+        assert cost == reference[seed], f"seed {seed}: {mode} found {cost}, UCS {reference[seed]}"
+        assert verify_plan(ship, moves).ok, f"seed {seed}"
+
+#the rules do fire on these bays, so the comparison above is not vacuous
+def test_default_rules_prune_something(small_bays):
+    rules = PruningRules()
+    for manifest in small_bays.values():
+        a_star_search(ContainerShip(manifest), max_expansions=10 ** 6, pruning=rules)
+    for rule in ("dominated_crane", "undo", "chain", "commute"):
+        assert rules.counts[rule] > 0, rule
+    assert rules.counts["idle"] == 0
@@ -0,0 +1,144 @@
+import os
+import random
+import pytest
+import pattern_db
+from container_ship import ContainerShip, MAX_COLS
+from manifestParser import parse_manifest_text
+from manifest_generator import manifest_text
+from astar import a_star_search
+from balance_solver import nearest_sums
+from pattern_db import (HEADER, NUM_PROFILES, PatternDatabase, SIDE_COLS, UNREACHED, arrival_cost, build_table,
+                        crossings_needed, profile_index, removal_cost, shuffle_cost, write_table)
+
+#height profile of one side as the database sees it: hull column first, keel column last
+def side_heights(ship, port):
+    return list(ship.heights[:SIDE_COLS]) if port else list(ship.heights[:SIDE_COLS - 1:-1])
+
+#column of the profile that a 1-indexed bay column maps to
+def side_col(col, port):
+    return col - 1 if port else MAX_COLS - col
+
+#every real move maps onto an abstract move of each side's profile that costs no more (see pattern_db)
+def test_abstract_moves_never_cost_more(small_bays):
+    for seed, manifest in small_bays.items():
+        rng = random.Random(seed)
+        ship = ContainerShip(manifest)
+        for _ in range(30):
+            moves = ship.get_candidate_moves()
+            for move in moves:
+                c1, c2 = move.start_pos[1], move.end_pos[1]
+                for port in (True, False):
+                    h = side_heights(ship, port)
+                    start_in = (c1 <= SIDE_COLS) == port
+                    end_in = (c2 <= SIDE_COLS) == port
+                    if start_in and end_in:
+                        assert shuffle_cost(h, side_col(c1, port), side_col(c2, port)) <= move.cost
+                    elif start_in:
+                        assert removal_cost(h, side_col(c1, port)) <= move.cost
+                    elif end_in:
+                        assert arrival_cost(h, side_col(c2, port)) <= move.cost
+            ship.make_move(rng.choice(moves))
+
+#a synthetic 4 layer file: layer k holds 10 * k everywhere, except for a few marked profiles
+SYNTHETIC = {(1, (0, 0, 0, 0, 0, 1)): 1, (3, (2, 0, 1, 0, 0, 4)): 17, (4, (8, 8, 8, 8, 8, 8)): UNREACHED}
+
+@pytest.fixture(scope="module")
+def synthetic(tmp_path_factory):
+    table = bytearray()
+    for k in range(1, 5):
+        layer = bytearray([10 * k]) * NUM_PROFILES
+        for (layer_k, heights), value in SYNTHETIC.items():
+            if layer_k == k:
+                layer[profile_index(heights)] = value
+        table += layer
+    path = str(tmp_path_factory.mktemp("pattern_db") / "synthetic.pdb")
+    write_table(path, table, 4)
+    db = PatternDatabase(path)
+    yield db, path
+    db.close()
+
+def test_lookup_reads_every_layer(synthetic):
+    db, _ = synthetic
+    assert db.layers == 4
+    assert db.lookup([0] * SIDE_COLS, 0) == 0.0
+    for k in range(1, 5):
+        assert db.lookup([1, 2, 3, 0, 0, 0], k) == 10 * k
+    #a k beyond the last layer reads the last one
+    assert db.lookup([1, 2, 3, 0, 0, 0], 9) == 40
+    for (k, heights), value in SYNTHETIC.items():
+        assert db.lookup(list(heights), k) == (float('inf') if value == UNREACHED else value)
+
+def test_bad_files_are_refused(synthetic, tmp_path):
+    _, path = synthetic
+    with open(path, "rb") as f:
+        data = f.read()
+    truncated = tmp_path / "truncated.pdb"
+    truncated.write_bytes(data[:-1])
+    with pytest.raises(ValueError, match="truncated"):
+        PatternDatabase(str(truncated))
+    foreign = tmp_path / "foreign.pdb"
+    foreign.write_bytes(b"XXPDB\x01" + data[len(b"XXPDB\x01"):])
+    with pytest.raises(ValueError, match="not a pattern database"):
+        PatternDatabase(str(foreign))
+
+#the real table: 4 layers take around a quarter of an hour to build, so these tests only run with --runslow.
+#the default table is used when it has been built (python pattern_db.py), else one is built into the pytest cache
+LAYERS = 4
+
+@pytest.fixture(scope="module")
+def database(request):
+    path = pattern_db.DEFAULT_PATH
+    if not os.path.exists(path) or os.path.getsize(path) < HEADER.size + LAYERS * NUM_PROFILES:
+        path = os.path.join(str(request.config.cache.mkdir("pattern_db")), f"column_profiles_{LAYERS}.pdb")
+        if not os.path.exists(path):
+            write_table(path, build_table(LAYERS), LAYERS)
+    db = PatternDatabase(path)
+    yield db
+    db.close()
+
+#the k each side of the state would be looked up with, as in PatternDatabase.lower_bound
+def looked_up_layers(ship):
+    below, above = nearest_sums(ship.balance.goal_sums, ship.port_weight)
+    layers = set()
+    if below is not None:
+        layers.add(crossings_needed(ship, True, ship.port_weight - below))
+    if above is not None:
+        layers.add(crossings_needed(ship, False, above - ship.port_weight))
+    return layers
+
+#along an optimal plan the cost still to go is known exactly, and the bound may never exceed it.
+#the lopsided bays have to carry up to four containers over, so every layer is looked up
+@pytest.mark.slow
+def test_lower_bound_is_admissible(database, small_bays):
+    bays = [(f"small {seed}", manifest) for seed, manifest in small_bays.items()]
+    bays += [(f"lopsided {seed}", parse_manifest_text(manifest_text("lopsided", seed))) for seed in range(6)]
+    layers = set()
+    for name, manifest in bays:
+        ship = ContainerShip(manifest)
+        moves, cost, _ = a_star_search(ship, max_expansions=10 ** 6)
+        assert moves is not None
+        g = 0
+        state = ship.copy()
+        for move in [None] + moves:
+            if move is not None:
+                state.make_move(move)
+                g += move.cost
+            layers |= looked_up_layers(state)
+            assert database.lower_bound(state) <= cost - g, f"{name} after {g} minutes"
+    assert set(range(1, LAYERS + 1)) <= layers
+
+#carrying one more container off can never be cheaper
+@pytest.mark.slow
+def test_layers_never_decrease(database):
+    rng = random.Random(0)
+    for _ in range(2000):
+        heights = [rng.randint(0, 8) for _ in range(SIDE_COLS)]
+        bounds = [database.lookup(heights, k) for k in range(1, LAYERS + 1)]
+        assert bounds == sorted(bounds), heights
+
+@pytest.mark.slow
+def test_lookup_edges(database):
+    #the keel column's top crosses in one minute at best
+    assert database.lookup([0] * (SIDE_COLS - 1) + [1], 1) == 1.0
+    #with a second one next to it, that one is two columns from the keel: three minutes for both
+    assert database.lookup([0] * (SIDE_COLS - 2) + [1, 1], 2) == 3.0
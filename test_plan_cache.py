@@ -0,0 +1,110 @@
+import functools
+import json
+import sqlite3
+import pytest
+import plan_cache
+from container_ship import ContainerShip
+from manifest_generator import manifest_text
+from manifestParser import parse_manifest_text
+from astar import a_star_search
+from plan_cache import PlanCache, cached_plan
+
+def lopsided_ship(seed=0):
+    return ContainerShip(parse_manifest_text(manifest_text("lopsided", seed)))
+
+#(moves, cost, num_moves) of the optimal plan, searched once per seed
+@functools.lru_cache(maxsize=None)
+def optimal_plan(seed=0):
+    return a_star_search(lopsided_ship(seed))
+
+#planner for cached_plan that counts its calls
+class CountingPlanner:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, ship):
+        self.calls += 1
+        return a_star_search(ship) + (1.0,)
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PlanCache(str(tmp_path / "plans.sqlite"))
+    yield cache
+    cache.close()
+
+def test_round_trip(cache):
+    ship = lopsided_ship()
+    moves, cost, num_moves = optimal_plan()
+    assert cache.get(ship) is None
+    cache.put(ship, moves, cost)
+
+    hit = cache.get(lopsided_ship()) #a fresh ship of the same manifest has the same fingerprint
+    assert hit is not None
+    assert hit.moves == moves
+    assert (hit.cost, hit.num_moves, hit.bound) == (cost, num_moves, 1.0)
+    assert cache.get(lopsided_ship(1)) is None
+
+def test_cached_plan_only_plans_once(cache):
+    planner = CountingPlanner()
+    first = cached_plan(cache, lopsided_ship(), planner)
+    second = cached_plan(cache, lopsided_ship(), planner)
+    assert planner.calls == 1
+    assert second == first
+
+def test_corrupted_row_is_dropped(cache):
+    ship = lopsided_ship()
+    moves, cost, _ = optimal_plan()
+    cache.put(ship, moves, cost)
+
+    #a stored cost that no longer matches the replayed moves
+    cache.conn.execute("UPDATE plans SET cost = cost + 1")
+    cache.conn.commit()
+    assert cache.get(ship) is None
+    assert cache.conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0] == 0
+
+    #moves that no longer replay at all
+    cache.put(ship, moves, cost)
+    cache.conn.execute("UPDATE plans SET moves = ?", (json.dumps([0]),))
+    cache.conn.commit()
+    assert cache.get(ship) is None
+
+def test_planner_version_change_drops_every_plan(tmp_path, monkeypatch):
+    path = str(tmp_path / "plans.sqlite")
+    ship = lopsided_ship()
+    moves, cost, _ = optimal_plan()
+    cache = PlanCache(path)
+    cache.put(ship, moves, cost)
+    cache.close()
+
+    monkeypatch.setattr(plan_cache, "PLANNER_VERSION", plan_cache.PLANNER_VERSION + "-next")
+    cache = PlanCache(path)
+    try:
+        assert cache.get(ship) is None
+    finally:
+        cache.close()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0] == 0
+
+def test_better_plan_replaces_a_bounded_one(cache):
+    ship = lopsided_ship()
+    moves, cost, _ = optimal_plan()
+    weighted, weighted_cost, _ = a_star_search(ship, weight=3.0)
+    cache.put(ship, weighted, weighted_cost, bound=3.0)
+
+    planner = CountingPlanner()
+    result = cached_plan(cache, ship, planner) #bound > 1, so it is planned again
+    assert planner.calls == 1
+    assert (result.cost, result.bound) == (cost, 1.0)
+    assert cache.get(ship).moves == moves
+
+def test_eviction_keeps_the_most_recent(tmp_path):
+    cache = PlanCache(str(tmp_path / "plans.sqlite"), max_entries=2)
+    try:
+        ships = [lopsided_ship(seed) for seed in range(3)]
+        for seed, ship in enumerate(ships):
+            moves, cost, _ = optimal_plan(seed)
+            cache.put(ship, moves, cost)
+        assert cache.get(ships[0]) is None
+        assert cache.get(ships[1]) is not None and cache.get(ships[2]) is not None
+    finally:
+        cache.close()
@@ -0,0 +1,45 @@
+import pytest
+from container_ship import ContainerShip
+from manifest_generator import manifest_text
+from manifestParser import parse_manifest_text
+from astar import a_star_search
+from plan_verifier import verify_plan, verified_cost
+
+#every container starts on port, so the plan has several moves to tamper with
+@pytest.fixture(scope="module")
+def planned():
+    ship = ContainerShip(parse_manifest_text(manifest_text("lopsided", 0)))
+    moves, cost, _ = a_star_search(ship)
+    assert moves
+    return ship, moves, cost
+
+def test_valid_plan_is_accepted(planned):
+    ship, moves, cost = planned
+    check = verify_plan(ship, moves)
+    assert check.ok and check.error is None
+    assert check.crane_minutes == cost
+    assert check.park_minutes == (ship.calculate_park_to_position_cost(moves[0].start_pos)
+                                  + ship.calculate_position_to_park_cost(moves[-1].end_pos))
+    assert verified_cost(ship, moves) == cost
+
+@pytest.mark.parametrize("tamper, step", [
+    (lambda m: m[:1] + [m[1]._replace(cost=m[1].cost + 1)] + m[2:], 2), #wrong minutes
+    (lambda m: [m[0]._replace(container_weight=m[0].container_weight + 1)] + m[1:], 1), #wrong weight
+    (lambda m: [m[0]._replace(end_pos=(m[0].end_pos[0] + 1, m[0].end_pos[1]))] + m[1:], 1), #floating
+    (lambda m: [m[0]._replace(start_pos=(m[0].start_pos[0] - 1, m[0].start_pos[1]))] + m[1:], 1), #buried
+    (lambda m: [m[0]._replace(end_pos=(m[0].end_pos[0], 13))] + m[1:], 1), #off the bay
+    (lambda m: m[:-1], 0), #stops before the ship is balanced
+])
+def test_tampered_plan_is_rejected(planned, tamper, step):
+    ship, moves, _ = planned
+    check = verify_plan(ship, tamper(list(moves)))
+    assert not check.ok
+    assert check.error
+    assert check.step == step
+    assert verified_cost(ship, tamper(list(moves))) is None
+
+def test_verifier_leaves_the_ship_alone(planned):
+    ship, moves, _ = planned
+    before = ship.state_key()
+    verify_plan(ship, moves)
+    assert ship.state_key() == before
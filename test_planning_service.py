@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from container_ship import ContainerShip, ContainerMove
+from manifestParser import parse_manifest_text
+from manifest_generator import manifest_text
+from planning_service import PlanningService, PlanningClient
+from plan_verifier import verify_plan
+
+if not hasattr(asyncio, "start_unix_server"):
+    pytest.skip("the service tests run over a Unix socket", allow_module_level=True)
+
+#plans in well under a second
+QUICK = manifest_text("lopsided", 0)
+
+#the nearly full bay (nearly_full_text) under IDA* with a huge budget keeps a job busy for a minute,
+#long enough to cancel it, let its deadline pass or fill the queue behind it
+SLOW_OPTIONS = {"mode": "ida", "max_expansions": 10 ** 9}
+
+#starts a service on a socket in tmp_path, connects a client and runs body(service, client)
+def run_with_service(tmp_path, body, **options):
+    async def main():
+        socket_path = str(tmp_path / "planner.sock")
+        service = PlanningService(**options)
+        await service.start(socket_path=socket_path)
+        client = await PlanningClient().connect(socket_path)
+        try:
+            return await asyncio.wait_for(body(service, client), 60)
+        finally:
+            await client.close()
+            await service.close()
+    return asyncio.run(main())
+
+#submits a slow job as a task and waits until its process is running (and, if asked, reporting progress)
+async def start_slow_job(client, slow, wait_for="started", **options):
+    events = []
+    ready = asyncio.Event()
+
+    def on_event(message):
+        events.append(message)
+        if message["event"] == wait_for:
+            ready.set()
+
+    task = asyncio.ensure_future(client.plan(manifest_text=slow, on_event=on_event, **SLOW_OPTIONS, **options))
+    await asyncio.wait_for(ready.wait(), 30)
+    return task, events
+
+def test_plan_is_done_and_replays(tmp_path):
+    async def body(service, client):
+        events = []
+        result = await client.plan(manifest_text=QUICK, on_event=events.append)
+        return result, events
+
+    result, events = run_with_service(tmp_path, body)
+    assert [m["event"] for m in events][:2] == ["queued", "started"]
+    assert result["event"] == "done"
+
+    ship = ContainerShip(parse_manifest_text(QUICK))
+    moves = [ContainerMove(tuple(m["from"]), tuple(m["to"]), m["weight"], m["minutes"]) for m in result["moves"]]
+    check = verify_plan(ship, moves)
+    assert check.ok
+    assert check.crane_minutes == result["crane_minutes"]
+    assert check.park_minutes == result["park_minutes"]
+
+def test_cancel_running_job(tmp_path, nearly_full_text):
+    async def body(service, client):
+        task, events = await start_slow_job(client, nearly_full_text, wait_for="progress")
+        await client.cancel(events[0]["job"])
+        return await task, service
+
+    result, service = run_with_service(tmp_path, body, progress_interval=0.1)
+    assert result["event"] == "cancelled"
+    assert not service.jobs
+
+def test_deadline_expires(tmp_path, nearly_full_text):
+    async def body(service, client):
+        return await client.plan(manifest_text=nearly_full_text, deadline=1.0, **SLOW_OPTIONS)
+
+    result = run_with_service(tmp_path, body)
+    assert result["event"] == "timeout"
+    assert result["seconds"] >= 1.0
+
+def test_full_queue_rejects(tmp_path, nearly_full_text):
+    async def body(service, client):
+        running, running_events = await start_slow_job(client, nearly_full_text)
+        waiting, waiting_events = await start_slow_job(client, nearly_full_text, wait_for="queued")
+        rejected = await client.plan(manifest_text=QUICK)
+        status = await client.status()
+        for events in (running_events, waiting_events):
+            await client.cancel(events[0]["job"])
+        return rejected, status, await running, await waiting
+
+    rejected, status, running, waiting = run_with_service(tmp_path, body, workers=1, queue_size=1)
+    assert rejected["event"] == "rejected"
+    assert rejected["error"] == "planner queue is full"
+    assert len(status["running"]) == 1 and status["queued"] == 1
+    assert running["event"] == waiting["event"] == "cancelled"